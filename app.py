@@ -0,0 +1,748 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+from pygame.locals import QUIT, KEYDOWN, K_r
+
+from frame_profiler import FrameProfiler, STAGES
+from list_navigation import JumpIndex, accelerate
+
+# Taktung der einzelnen Aufgaben
+INPUT_INTERVAL = 0.001          # 1 kHz Eingabe-Abfrage, solange bedient wird
+INPUT_ACTIVE_TIME = 1.0         # So lange nach der letzten Eingabe schnell abfragen
+INPUT_IDLE_INTERVAL = 0.05      # Im Leerlauf ohne INT-Leitung: 20 Hz I2C-Abfrage
+INPUT_INTERRUPT_TIMEOUT = 0.25  # Mit INT-Leitung: höchstens so lange auf die Flanke warten
+PLAYBACK_POLL_INTERVAL = 0.02   # VLC-Events abholen
+PLAY_TICK_SLACK = 0.005         # Etwas nach dem Sekundenwechsel aufwachen, nicht knapp davor
+SCAN_PROGRESS_INTERVAL = 0.5
+VOLUME_DISPLAY_DURATION = 1.0
+MARQUEE_STEP_INTERVAL = 0.1
+DEBUG_OVERLAY_INTERVAL = 0.5
+METRICS_INTERVAL = 5.0
+LIBRARY_POLL_INTERVAL = 1.0
+JUMP_MODE_TIMEOUT = 3.0
+# Solange die Hüllkurve (bzw. das Cover) des Titels fehlt, in diesem Abstand erneut im Index nachsehen
+WAVEFORM_RETRY_INTERVAL = 2.0
+COVER_RETRY_INTERVAL = 2.0
+TOAST_DURATION = 1.5
+REPEAT_LABELS = {"all": "Alle", "one": "Eins", "off": "Aus"}
+
+
+class MenuStateMachine:
+    """
+    Menü- und Wiedergabezustand ohne Hardware-Zugriffe. Eingaben und
+    Wiedergabe-Ereignisse verändern den Zustand; alles, was den Player
+    betrifft, wird als Befehl zurückgegeben, z.B. ("play", 3) oder ("pause",).
+    """
+
+    main_menu_options = ["Musik", "Einstellungen"]
+    music_menu_options = ["Alle Songs", "Interpret", "Album"]
+    theme_options = ["Grün", "Purple", "White"]
+
+    def __init__(self, audio_player, ui, width, height, volume=0.5, profiler=None):
+        self.audio_player = audio_player
+        self.ui = ui
+        self.profiler = profiler
+        self.width = width
+        self.height = height
+
+        self.state = "main_menu"
+        self.selected_index = 0
+        self.current_song_index = None
+        self.paused = False
+        # Kurze Meldung (z.B. "Als Nächstes: ...") bis toast_until
+        self.toast_text = None
+        self.toast_until = 0
+
+        # Aktuell angezeigte Songliste als Indizes in audio_player.audio_files.
+        # Titel und Positionen werden nur beim Wechsel der Liste berechnet, nicht pro Frame.
+        self.song_view = audio_player.title_order
+        self.song_view_titles = audio_player.sorted_titles
+        self.song_view_pos = None # None = Alle Songs, Positionen in audio_player.title_position
+        self.song_view_parent = "music_menu"
+        # Interpreten- bzw. Album-Auswahl
+        self.browse_kind = None
+        self.browse_items = []
+        self.browse_selected = 0
+
+        # Scroll-Variablen
+        self.play_scroll_offset = 0
+        self.last_play_scroll_time = time.time()
+        self.main_scroll_offset = 0
+        self.last_main_scroll_time = time.time()
+        self.main_menu_scroll_y = 0
+        self.list_line_height = ui.font.get_linesize() + 2
+        # Breite des ausgewählten Titels, nur bei Auswahlwechsel neu messen
+        self.selected_width_key = None
+        self.selected_text_width = 0
+
+        self.volume = volume
+        self.last_volume_change_time = time.time()
+        self.volume_overlay_visible = False
+        self.last_play_key = None
+
+        # Werte für den Play-Screen, in update() berechnet
+        self.title_text = ""
+        self.elapsed = 0.0
+        self.progress = 0.0
+        self.scanning = False
+        self.waveform = None
+        self.waveform_index = None
+        self.last_waveform_check = 0.0
+        self.cover = None
+        self.cover_index = None
+        self.last_cover_check = 0.0
+        # Cover, das das Display in den nächsten Frame einsetzen soll (None = keins)
+        self.overlay = None
+        # Verstecktes Profiler-Overlay (langer Druck auf "links")
+        self.debug_overlay = False
+        self.last_debug_overlay_time = 0.0
+        # Sprungmodus (langer Druck auf "rechts"): Encoder springt von Buchstabe zu Buchstabe
+        self.jump_mode = False
+        self.jump_index = None
+        self.jump_source = None
+        self.last_jump_time = 0.0
+
+    # --- Eingaben ---
+
+    def _list_keys(self):
+        """Angezeigte Einträge der offenen Liste; "Alle Songs" und die Browse-Listen sind ohne Groß-/Kleinschreibung sortiert."""
+        if self.state == "browse_menu":
+            return self.browse_items
+        return self.song_view_titles
+
+    def _get_jump_index(self):
+        keys = self._list_keys()
+        # Nur neu aufbauen, wenn sich die Liste geändert hat
+        if self.jump_source is not keys:
+            self.jump_index = JumpIndex(keys)
+            self.jump_source = keys
+        return self.jump_index
+
+    def _settings_options(self):
+        queue = self.audio_player.queue
+        return self.theme_options + [
+            "Zufall: " + ("An" if queue.shuffle else "Aus"),
+            "Wiederholen: " + REPEAT_LABELS[queue.repeat],
+        ]
+
+    def _show_toast(self, text):
+        self.toast_text = text
+        self.toast_until = time.time() + TOAST_DURATION
+
+    def _move_in_list(self, delta, speed, length):
+        if self.jump_mode:
+            self.last_jump_time = time.time()
+            return self._get_jump_index().step(self.selected_index, delta)
+        return (self.selected_index + accelerate(delta, speed, length)) % length
+
+    def handle_encoder(self, delta, speed=0.0):
+        """delta in Rasten, speed in Rasten/s (für die Beschleunigung in langen Listen)."""
+        commands = []
+        if self.state == "main_menu":
+            self.selected_index = (self.selected_index + delta) % len(self.main_menu_options)
+        elif self.state == "music_menu":
+            self.selected_index = (self.selected_index + delta) % len(self.music_menu_options)
+        elif self.state == "settings_menu":
+            self.selected_index = (self.selected_index + delta) % len(self._settings_options())
+        elif self.state == "all_songs_menu" and self.song_view:
+            self.selected_index = self._move_in_list(delta, speed, len(self.song_view))
+            self.main_scroll_offset = 0
+        elif self.state == "browse_menu" and self.browse_items:
+            self.selected_index = self._move_in_list(delta, speed, len(self.browse_items))
+            self.main_scroll_offset = 0
+        elif self.state == "play":
+            self.volume = max(0.0, min(1.0, self.volume + (delta * 0.05)))
+            self.last_volume_change_time = time.time()
+            commands.append(("volume", self.volume))
+        return commands
+
+    def handle_button(self, button, action):
+        if action == "long_press" and button == "left" and self.profiler is not None and self.profiler.enabled:
+            self.debug_overlay = not self.debug_overlay
+            return []
+        if action == "long_press" and button == "right" and self.state in ("all_songs_menu", "browse_menu"):
+            self.jump_mode = not self.jump_mode
+            self.last_jump_time = time.time()
+            return []
+        if action != "press":
+            return []
+        if self.jump_mode and button in ("select", "up"):
+            # Auswahl bestätigen bzw. abbrechen beendet nur den Sprungmodus
+            self.jump_mode = False
+            return []
+        if button == "select":
+            return self._select()
+        if button == "up":
+            self._back()
+        elif button == "down":
+            if self.state == "play" or (self.state == "all_songs_menu" and self.current_song_index is not None):
+                self.paused = not self.paused
+                return [("pause",)]
+        elif button == "left" and self.state == "play":
+            return [("previous",)]
+        elif button == "left" and self.state == "all_songs_menu" and self.song_view:
+            # Markierten Titel hinter den laufenden einreihen
+            song_index = self.song_view[self.selected_index]
+            self._show_toast("Als Nächstes: " + self.audio_player.titles[song_index])
+            return [("enqueue", song_index)]
+        elif button == "right" and self.state == "play":
+            return [("next",)]
+        return []
+
+    def _show_song_view(self, indices, parent):
+        if indices is None:
+            self.song_view = self.audio_player.title_order
+            self.song_view_titles = self.audio_player.sorted_titles
+            self.song_view_pos = None
+        else:
+            self.song_view = indices
+            self.song_view_titles = [self.audio_player.titles[i] for i in indices]
+            self.song_view_pos = {song_index: pos for pos, song_index in enumerate(indices)}
+        self.song_view_parent = parent
+        self.state = "all_songs_menu"
+        self.selected_index = 0
+        self.main_menu_scroll_y = 0
+
+    def _select(self):
+        state = self.state
+        if state == "main_menu":
+            if self.selected_index == 0: # Musik
+                self.state = "music_menu"
+                self.selected_index = 0
+            elif self.selected_index == 1: # Einstellungen
+                self.state = "settings_menu"
+                self.selected_index = 0
+        elif state == "music_menu":
+            if self.selected_index == 0: # Alle Songs
+                self._show_song_view(None, "music_menu")
+            else: # Interpret / Album: Liste kommt über show_browse()
+                return [("browse", "artist" if self.selected_index == 1 else "album")]
+        elif state == "browse_menu" and self.browse_items:
+            return [("browse_tracks", self.browse_kind, self.browse_items[self.selected_index])]
+        elif state == "settings_menu":
+            if self.selected_index < len(self.theme_options):
+                self.ui.set_theme(self.selected_index)
+            elif self.selected_index == len(self.theme_options):
+                return [("shuffle", not self.audio_player.queue.shuffle)]
+            else:
+                return [("repeat",)]
+        elif state == "all_songs_menu" and self.song_view:
+            song_index = self.song_view[self.selected_index]
+            self.state = "play"
+            if self.current_song_index != song_index:
+                self.current_song_index = song_index
+                self.paused = False
+                return [("play", song_index)]
+        elif state == "play": # Drücken im Play-Screen pausiert/spielt
+            self.paused = not self.paused
+            return [("pause",)]
+        return []
+
+    def show_browse(self, kind, items):
+        """Interpreten bzw. Alben sind im Hintergrund aus der TrackTable geholt worden."""
+        if self.state != "music_menu":
+            return # inzwischen weiternavigiert
+        self.browse_kind = kind
+        self.browse_items = items
+        self.state = "browse_menu"
+        self.selected_index = 0
+        self.main_menu_scroll_y = 0
+
+    def show_browse_tracks(self, kind, indices):
+        """Titel des gewählten Interpreten bzw. Albums öffnen."""
+        if self.state != "browse_menu" or self.browse_kind != kind:
+            return
+        self.browse_selected = self.selected_index
+        self._show_song_view(indices, "browse_menu")
+
+    def _back(self):
+        state = self.state
+        if state == "play":
+            self.state = "all_songs_menu"
+        elif state == "all_songs_menu":
+            self.state = self.song_view_parent
+            if self.song_view_parent == "browse_menu":
+                self.selected_index = self.browse_selected
+            else:
+                self.selected_index = 0 # Setzt den Fokus zurück auf "Alle Songs"
+            self.main_menu_scroll_y = 0
+        elif state == "browse_menu":
+            self.state = "music_menu"
+            self.selected_index = 1 if self.browse_kind == "artist" else 2
+        elif state in ["music_menu", "settings_menu"]:
+            self.state = "main_menu"
+            self.selected_index = 0
+
+    # --- Wiedergabe ---
+
+    def handle_playback_event(self, playback_event):
+        self.paused = False
+        if playback_event == "track_changed":
+            # Nahtloser Wechsel zum vorgeladenen Titel
+            self.current_song_index = self.audio_player.current_index
+            return []
+        if playback_event == "finished":
+            # Titel zu Ende gelaufen: Warteschlange entscheidet (Wiederholen, Ende)
+            return [("advance",)]
+        # Fehler: Titel überspringen
+        return [("next",)]
+
+    def song_started(self, index):
+        self.current_song_index = index
+        # Am Ende der Warteschlange bzw. pausiert fortgesetzt bleibt der Player stehen
+        self.paused = self.audio_player.paused
+
+    def library_changed(self, remap):
+        """Songliste hat sich geändert (Watcher); remap bildet alte auf neue Indizes ab."""
+        if self.current_song_index is not None:
+            self.current_song_index = self.audio_player.current_index
+        if self.current_song_index is None and self.state == "play":
+            # Alle Titel gelöscht: es gibt nichts mehr anzuzeigen
+            self.state = "all_songs_menu"
+            self.paused = True
+
+        # selected_index gehört zur Songliste, solange sie offen ist oder der Play-Screen darüber liegt
+        in_list = self.state in ("all_songs_menu", "play") and self.song_view
+        selected_song = remap(self.song_view[self.selected_index]) if in_list else None
+        if self.song_view_pos is None:
+            self.song_view = self.audio_player.title_order
+            self.song_view_titles = self.audio_player.sorted_titles
+        else:
+            indices = [index for index in map(remap, self.song_view) if index is not None]
+            self.song_view = indices
+            self.song_view_titles = [self.audio_player.titles[i] for i in indices]
+            self.song_view_pos = {song_index: pos for pos, song_index in enumerate(indices)}
+
+        if in_list:
+            # Auswahl bleibt auf demselben Titel, wenn es ihn noch gibt
+            if selected_song is not None and self.song_view_pos is None:
+                self.selected_index = self.audio_player.title_position[selected_song]
+            elif selected_song is not None:
+                self.selected_index = self.song_view_pos[selected_song]
+            else:
+                self.selected_index = min(self.selected_index, max(0, len(self.song_view) - 1))
+
+    # --- Zeitabhängige Updates und Zeichnen ---
+
+    def update(self, now, scheduler):
+        """Scroll-Offsets, Fortschritt und Termine für den Scheduler; zeichnet nichts."""
+        state = self.state
+        if state in ("all_songs_menu", "browse_menu"):
+            list_titles = self.song_view_titles if state == "all_songs_menu" else self.browse_items
+            line_height = self.list_line_height
+            selected_y_on_screen = 5 + self.selected_index * line_height - self.main_menu_scroll_y
+            if selected_y_on_screen + line_height > self.height:
+                self.main_menu_scroll_y = (self.selected_index + 1) * line_height - self.height + 5
+            if selected_y_on_screen < 5:
+                self.main_menu_scroll_y = self.selected_index * line_height
+
+            # Horizontalen Scroll-Offset für lange Titel berechnen
+            width_key = (id(list_titles), self.selected_index)
+            if width_key != self.selected_width_key:
+                self.selected_text_width = self.ui.font.size(list_titles[self.selected_index])[0] if list_titles else 0
+                self.selected_width_key = width_key
+            if self.selected_text_width > self.width - 30:
+                if now - self.last_main_scroll_time > MARQUEE_STEP_INTERVAL:
+                    self.main_scroll_offset += 2
+                    self.last_main_scroll_time = now
+                    scheduler.mark_dirty()
+                scheduler.schedule(self.last_main_scroll_time + MARQUEE_STEP_INTERVAL)
+            else:
+                self.main_scroll_offset = 0
+
+        elif state == "play":
+            song_length = self.audio_player.song_length
+            # Interpolierte Position, kein libvlc-Aufruf pro Frame
+            self.elapsed = self.audio_player.get_current_time()
+            self.progress = min(1.0, self.elapsed / song_length) if song_length > 0 else 0
+
+            # Neu zeichnen, sobald der Balken einen Pixel wächst oder die Sekunde wechselt
+            play_key = (self.current_song_index, int((self.width - 20) * self.progress), int(self.elapsed))
+            if play_key != self.last_play_key:
+                self.last_play_key = play_key
+                scheduler.mark_dirty()
+
+            # Der Render-Task schläft bis zum nächsten Termin: Sekundenwechsel bzw. nächster Pixel
+            if not self.paused:
+                step = 1.0 - self.elapsed % 1.0
+                if song_length > 0:
+                    pixel_time = song_length / (self.width - 20)
+                    step = min(step, pixel_time - self.elapsed % pixel_time)
+                scheduler.schedule(now + step + PLAY_TICK_SLACK)
+
+            self.title_text = self.audio_player.titles[self.current_song_index]
+
+            # Hüllkurve nur beim Titelwechsel bzw. selten nachladen, nie pro Frame
+            if self.waveform_index != self.current_song_index or (
+                self.waveform is None and now - self.last_waveform_check > WAVEFORM_RETRY_INTERVAL
+            ):
+                self.waveform = self.audio_player.get_waveform(self.current_song_index)
+                self.waveform_index = self.current_song_index
+                self.last_waveform_check = now
+                scheduler.mark_dirty()
+            if self.cover_index != self.current_song_index or (
+                self.cover is None and now - self.last_cover_check > COVER_RETRY_INTERVAL
+            ):
+                cover = self.audio_player.get_cover(self.current_song_index)
+                if cover is not self.cover:
+                    scheduler.mark_dirty()
+                self.cover = cover
+                self.cover_index = self.current_song_index
+                self.last_cover_check = now
+            title_width = self.ui.play_font.size(self.title_text)[0]
+            if title_width > self.width - 20:
+                if now - self.last_play_scroll_time > MARQUEE_STEP_INTERVAL:
+                    self.play_scroll_offset += 2
+                    self.last_play_scroll_time = now
+                    scheduler.mark_dirty()
+                scheduler.schedule(self.last_play_scroll_time + MARQUEE_STEP_INTERVAL)
+            else:
+                self.play_scroll_offset = 0
+
+            # Lautstärke-Overlay muss nach Ablauf verschwinden
+            volume_hide_time = self.last_volume_change_time + VOLUME_DISPLAY_DURATION
+            if now < volume_hide_time:
+                scheduler.schedule(volume_hide_time)
+                self.volume_overlay_visible = True
+            elif self.volume_overlay_visible:
+                self.volume_overlay_visible = False
+                scheduler.mark_dirty()
+
+        # Während der Bibliotheks-Scan läuft, Fortschritt regelmäßig aktualisieren
+        self.scanning = state != "play" and self.audio_player.scanner.running
+        if self.scanning:
+            scheduler.schedule(now + SCAN_PROGRESS_INTERVAL)
+
+        if self.jump_mode:
+            jump_end = self.last_jump_time + JUMP_MODE_TIMEOUT
+            if now >= jump_end or state not in ("all_songs_menu", "browse_menu"):
+                self.jump_mode = False
+                scheduler.mark_dirty()
+            else:
+                scheduler.schedule(jump_end)
+
+        if self.toast_text is not None:
+            if now >= self.toast_until:
+                self.toast_text = None
+                scheduler.mark_dirty()
+            else:
+                scheduler.schedule(self.toast_until)
+
+        if self.debug_overlay:
+            if now - self.last_debug_overlay_time >= DEBUG_OVERLAY_INTERVAL:
+                self.last_debug_overlay_time = now
+                scheduler.mark_dirty()
+            scheduler.schedule(self.last_debug_overlay_time + DEBUG_OVERLAY_INTERVAL)
+
+    def render(self, screen):
+        ui = self.ui
+        state = self.state
+        if state == "main_menu":
+            ui.draw_generic_menu(screen, self.main_menu_options, self.selected_index, "Hauptmenü")
+        elif state == "music_menu":
+            ui.draw_generic_menu(screen, self.music_menu_options, self.selected_index, "Musik")
+        elif state == "settings_menu":
+            ui.draw_generic_menu(screen, self._settings_options(), self.selected_index, "Einstellungen")
+        elif state == "all_songs_menu":
+            # Position des laufenden Songs in der angezeigten Liste
+            if self.current_song_index is None:
+                current_in_view = None
+            elif self.song_view_pos is None:
+                current_in_view = self.audio_player.title_position[self.current_song_index]
+            else:
+                current_in_view = self.song_view_pos.get(self.current_song_index)
+            ui.draw_all_songs_menu(screen, self.song_view_titles, self.selected_index, current_in_view, self.paused, self.main_scroll_offset, self.main_menu_scroll_y)
+        elif state == "browse_menu":
+            ui.draw_list_menu(screen, self.browse_items, self.selected_index, self.main_scroll_offset, self.main_menu_scroll_y)
+        elif state == "play":
+            ui.draw_play_menu(screen, self.title_text, self.progress, self.elapsed, self.audio_player.song_length, not self.paused, self.play_scroll_offset, self.volume, self.last_volume_change_time, VOLUME_DISPLAY_DURATION, self.waveform)
+
+        if self.scanning:
+            ui.draw_scan_progress(screen, self.audio_player.scanner.get_progress())
+        if self.jump_mode:
+            ui.draw_jump_label(screen, self._get_jump_index().label_at(self.selected_index))
+        if self.toast_text is not None:
+            ui.draw_toast(screen, self.toast_text)
+        if self.debug_overlay:
+            ui.draw_debug_overlay(screen, self.profiler.summary_lines())
+        # Nicht über der Lautstärkeanzeige oder dem Debug-Overlay einsetzen
+        show_cover = state == "play" and not self.volume_overlay_visible and not self.debug_overlay
+        self.overlay = self.cover if show_cover and self.cover is not False else None
+
+
+class App:
+    """
+    asyncio-Kern: Eingabe, Rendern, Display-Flush und Wiedergabe laufen als
+    eigene Tasks mit eigener Taktung. Blockierende Hardware-Aufrufe (I2C,
+    SPI, libvlc) laufen in Executors, damit ein hängender SPI-Transfer oder
+    VLC-Aufruf die Eingabe nicht aufhält.
+    """
+
+    def __init__(self, machine, audio_player, seesaw_input, scheduler, display_controller=None, frame_pipeline=None, screen_size=(160, 128), profiler=None):
+        self.machine = machine
+        self.audio_player = audio_player
+        self.seesaw_input = seesaw_input
+        self.scheduler = scheduler
+        self.display_controller = display_controller
+        self.frame_pipeline = frame_pipeline
+
+        # Messpunkte nur einsetzen, wenn der Profiler läuft - sonst bleiben die Originalmethoden
+        self.profiler = profiler if profiler is not None else FrameProfiler(enabled=False)
+        self.profiler.instrument(seesaw_input, ["poll"], "input")
+        self.profiler.instrument(machine.ui, [name for name in STAGES if name.startswith("draw_")])
+        if display_controller is not None:
+            self.profiler.instrument(display_controller, ["convert_surface"], "rgb565")
+            self.profiler.instrument(display_controller, ["flush"], "spi")
+        if frame_pipeline is not None:
+            self.profiler.instrument(frame_pipeline, ["present"])
+        self.profiler.instrument(audio_player, ["poll_events", "play_song", "next_song", "previous_song", "pause", "set_volume"], "vlc")
+
+        # Jeder Executor bedient genau eine Hardware, damit die Aufrufe serialisiert bleiben
+        self.input_executor = ThreadPoolExecutor(1, thread_name_prefix="input")
+        self.display_executor = ThreadPoolExecutor(1, thread_name_prefix="display")
+        self.vlc_executor = ThreadPoolExecutor(1, thread_name_prefix="vlc")
+
+        # Ohne Pipeline: zwei Surfaces, gezeichnet wird in die eine, gesendet die andere
+        if frame_pipeline is None:
+            self.surfaces = [machine.ui.create_surface(screen_size), machine.ui.create_surface(screen_size)]
+        else:
+            self.surfaces = None
+        self.back = 0
+        self.flush_surface = None
+        # Zuletzt an das Display gegebene Palette (nur im Palettenmodus)
+        self.palette_sent = None
+        self.overlay_sent = None
+
+        self.running = True
+        self.tasks = []
+        self.commands = None
+        self.wakeup = None
+        self.frame_ready = None
+        self.flush_idle = None
+
+    async def run(self):
+        self.commands = asyncio.Queue()
+        self.wakeup = asyncio.Event()
+        self.frame_ready = asyncio.Event()
+        self.flush_idle = asyncio.Event()
+        self.flush_idle.set()
+        self.commands.put_nowait(("volume", self.machine.volume))
+        self.commands.put_nowait(("resume",))
+
+        self.tasks = [
+            asyncio.create_task(self.input_task()),
+            asyncio.create_task(self.render_task()),
+            asyncio.create_task(self.flush_task()),
+            asyncio.create_task(self.playback_task()),
+        ]
+        self.tasks.append(asyncio.create_task(self.library_task()))
+        if self.profiler.enabled and self.profiler.metrics_path:
+            self.tasks.append(asyncio.create_task(self.metrics_task()))
+        try:
+            await asyncio.gather(*self.tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for task in self.tasks:
+                task.cancel()
+            for executor in (self.input_executor, self.display_executor, self.vlc_executor):
+                executor.shutdown(wait=False)
+            # Keine Surfaces der Pipeline mehr festhalten, sonst lässt sich der Speicher nicht freigeben
+            self.flush_surface = None
+            self.tasks = []
+
+    def stop(self):
+        self.running = False
+        for task in self.tasks:
+            if task is not asyncio.current_task():
+                task.cancel()
+
+    def _dispatch(self, commands):
+        for command in commands:
+            self.commands.put_nowait(command)
+
+    async def input_task(self):
+        loop = asyncio.get_running_loop()
+        last_input = time.monotonic()
+        while self.running:
+            # --- Tastatur-Events (für Debugging am PC) ---
+            key_events = []
+            for event in pygame.event.get():
+                if event.type == QUIT:
+                    self.stop()
+                    return
+                elif event.type == KEYDOWN and event.key == K_r:
+                    # Globale "Zurück"-Taste, verhält sich wie die Up-Taste
+                    key_events.append(("up", "press"))
+
+            button_events = await loop.run_in_executor(self.input_executor, self.seesaw_input.poll)
+            button_events += key_events
+            delta = self.seesaw_input.get_encoder_delta()
+
+            if delta != 0:
+                self._dispatch(self.machine.handle_encoder(delta, self.seesaw_input.get_encoder_speed()))
+            for button, action in button_events:
+                self._dispatch(self.machine.handle_button(button, action))
+
+            # Jede Eingabe kann den Bildschirm verändern - sofort rendern
+            if delta != 0 or button_events:
+                self.scheduler.mark_dirty()
+                self.wakeup.set()
+
+            now = time.monotonic()
+            if delta != 0 or button_events or self.seesaw_input.is_active(now):
+                last_input = now
+            if now - last_input < INPUT_ACTIVE_TIME:
+                await asyncio.sleep(INPUT_INTERVAL)
+            elif self.seesaw_input.has_interrupt:
+                # Leerlauf: auf die INT-Flanke warten statt den Seesaw abzufragen
+                await loop.run_in_executor(self.input_executor, self.seesaw_input.wait_for_interrupt, INPUT_INTERRUPT_TIMEOUT)
+            else:
+                await asyncio.sleep(INPUT_IDLE_INTERVAL)
+
+    async def _sync_palette(self):
+        """Nach einem Theme-Wechsel im Palettenmodus nur die Farbtabelle tauschen."""
+        palette = self.machine.ui.palette
+        if palette is None or palette is self.palette_sent:
+            return
+        target = self.frame_pipeline if self.frame_pipeline is not None else self.display_controller
+        # Im Display-Executor, damit die Tabelle in Reihenfolge mit den Frames ankommt
+        await asyncio.get_running_loop().run_in_executor(self.display_executor, target.set_palette, palette)
+        self.palette_sent = palette
+
+    async def _sync_overlay(self):
+        """Cover nur bei Änderungen an das Display geben; es bleibt bis zum nächsten Wechsel stehen."""
+        overlay = self.machine.overlay
+        if overlay is self.overlay_sent:
+            return
+        target = self.frame_pipeline if self.frame_pipeline is not None else self.display_controller
+        position = self.machine.ui.cover_position
+        await asyncio.get_running_loop().run_in_executor(self.display_executor, target.set_overlay, overlay, position)
+        self.overlay_sent = overlay
+
+    async def render_task(self):
+        while self.running:
+            now = time.time()
+            with self.profiler.section("update"):
+                self.machine.update(now, self.scheduler)
+            if self.scheduler.should_render(now):
+                if self.frame_pipeline is not None:
+                    # Die Pipeline gibt die nächste Zeichenfläche erst nach present() frei
+                    await self.flush_idle.wait()
+                    surface = self.frame_pipeline.get_surface()
+                else:
+                    surface = self.surfaces[self.back]
+                with self.profiler.section("render"):
+                    self.machine.render(surface)
+                self.scheduler.frame_rendered(now)
+
+                # Nur einen Frame gleichzeitig übertragen
+                await self.flush_idle.wait()
+                self.flush_idle.clear()
+                await self._sync_palette()
+                await self._sync_overlay()
+                self.flush_surface = surface
+                if self.surfaces is not None:
+                    self.back = 1 - self.back
+                self.frame_ready.set()
+
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.scheduler.get_sleep_time())
+            except asyncio.TimeoutError:
+                pass
+
+    async def flush_task(self):
+        loop = asyncio.get_running_loop()
+        while self.running:
+            await self.frame_ready.wait()
+            self.frame_ready.clear()
+            if self.frame_pipeline is not None:
+                await loop.run_in_executor(self.display_executor, self.frame_pipeline.present)
+            else:
+                await loop.run_in_executor(self.display_executor, self.display_controller.update_display, self.flush_surface)
+            self.flush_idle.set()
+
+    async def playback_task(self):
+        loop = asyncio.get_running_loop()
+        player = self.audio_player
+        while self.running:
+            try:
+                command = await asyncio.wait_for(self.commands.get(), PLAYBACK_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                command = None
+
+            if command is None:
+                playback_events = await loop.run_in_executor(self.vlc_executor, player.poll_events)
+                for playback_event in playback_events:
+                    self._dispatch(self.machine.handle_playback_event(playback_event))
+                if playback_events:
+                    self.scheduler.mark_dirty()
+                    self.wakeup.set()
+                continue
+
+            name = command[0]
+            if name == "library":
+                if await self._apply_library_changes():
+                    self.scheduler.mark_dirty()
+                    self.wakeup.set()
+                continue
+            if name == "play":
+                index = await loop.run_in_executor(self.vlc_executor, player.play_song, command[1])
+                self.machine.song_started(index)
+            elif name == "next":
+                self.machine.song_started(await loop.run_in_executor(self.vlc_executor, player.next_song))
+            elif name == "advance":
+                self.machine.song_started(await loop.run_in_executor(self.vlc_executor, player.next_song, True))
+            elif name == "resume":
+                index = await loop.run_in_executor(self.vlc_executor, player.resume)
+                if index is not None:
+                    self.machine.song_started(index)
+            elif name == "previous":
+                self.machine.song_started(await loop.run_in_executor(self.vlc_executor, player.previous_song))
+            elif name == "pause":
+                await loop.run_in_executor(self.vlc_executor, player.pause)
+            elif name == "volume":
+                await loop.run_in_executor(self.vlc_executor, player.set_volume, command[1])
+            elif name == "enqueue":
+                await loop.run_in_executor(self.vlc_executor, player.enqueue, command[1])
+            elif name == "shuffle":
+                await loop.run_in_executor(self.vlc_executor, player.set_shuffle, command[1])
+            elif name == "repeat":
+                await loop.run_in_executor(self.vlc_executor, player.cycle_repeat)
+            elif name == "browse":
+                # Die TrackTable wird bei Bedarf neu aufgebaut: nicht auf dem Event-Loop,
+                # und hier nie gleichzeitig mit einem Tausch der Songliste
+                items = await loop.run_in_executor(self.vlc_executor, player.get_browse_items, command[1])
+                self.machine.show_browse(command[1], items)
+            elif name == "browse_tracks":
+                indices = await loop.run_in_executor(self.vlc_executor, player.get_track_indices, command[1], command[2])
+                self.machine.show_browse_tracks(command[1], indices)
+            self.scheduler.mark_dirty()
+            self.wakeup.set()
+
+    async def _apply_library_changes(self):
+        """Läuft im playback_task, damit kein anderer Player-Aufruf parallel zum Tausch der Listen läuft."""
+        loop = asyncio.get_running_loop()
+        player = self.audio_player
+        change = await loop.run_in_executor(self.vlc_executor, player.poll_library_changes)
+        if change is None:
+            return False
+        # Player und Menü im selben Schritt umstellen: render_task sieht nie
+        # die neuen Listen zusammen mit den alten Indizes des Menüs
+        self.machine.library_changed(player.swap_library(*change))
+        await loop.run_in_executor(self.vlc_executor, player.finish_library_swap)
+        return True
+
+    async def library_task(self):
+        while self.running:
+            await asyncio.sleep(LIBRARY_POLL_INTERVAL)
+            self.commands.put_nowait(("library",))
+
+    async def metrics_task(self):
+        loop = asyncio.get_running_loop()
+        while self.running:
+            await asyncio.sleep(METRICS_INTERVAL)
+            await loop.run_in_executor(None, self.profiler.write_metrics)
@@ -1,88 +1,626 @@
 import os
 import time
-import vlc
-import wave
-
-try:
-    from mutagen.mp3 import MP3
-    from mutagen.wave import WAVE
-    from mutagen.flac import FLAC
-except ImportError:
-    MP3 = None
-    WAVE = None
-    FLAC = None
+import queue
+import bisect
+import importlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from library_index import LibraryIndex, LibraryScanner, walk_audio_files
+from library_watcher import LibraryWatcher
+from waveform import WaveformAnalyzer, replay_gain
+from cover_art import CoverArtCache
+from play_queue import PlayQueue, StateJournal, REPEAT_MODES, STATE_FILENAME
+from track_table import TrackTable
 
 class AudioPlayer:
-    def __init__(self, folder):
-        self.vlc_instance = vlc.Instance()
-        self.player = self.vlc_instance.media_player_new()
+    def __init__(self, folder, scan_workers=2, scan_processes=True, preload_next=True, vlc_module=None, start_scan=True, watch=True, waveforms=True, covers=True, persist_state=True):
+        # Gapless: Der MediaListPlayer wechselt selbst zum vorgeladenen nächsten Titel
+        self.preload_next = preload_next
+        self.media_list = None
+
+        # VLC meldet Zustandswechsel über Events in eine Queue, die der
+        # Hauptloop abholt - statt jeden Frame libvlc abzufragen
+        self.events = queue.Queue()
+
+        # libvlc laden und die Instanz anlegen dauert auf dem Pi spürbar -
+        # das passiert im Hintergrund, während das Menü schon angezeigt wird.
+        # vlc_module ist austauschbar (z.B. sim_backends.FakeVlc für Benchmarks ohne libvlc)
+        self.vlc = None
+        self.vlc_instance = None
+        self.player = None
+        self.list_player = None
+        self.vlc_error = None
+        self.vlc_ready = threading.Event()
+        threading.Thread(target=self._init_vlc, args=(vlc_module,), name="vlc-init", daemon=True).start()
+
         self.folder = folder
-        self.audio_files = sorted([f for f in os.listdir(folder) if f.lower().endswith(('.mp3', '.wav', 'flac'))])
+        # Relative Pfade, auch in Unterordnern (Interpret/Album/Titel.mp3)
+        self.audio_files = sorted(walk_audio_files(folder))
         if not self.audio_files:
             raise FileNotFoundError("Keine Audio-Dateien gefunden!")
 
-        # Platzhalter für Metadaten - für "Interpret" und "Album"
-        self.metadata = []
-        # self._load_metadata() # Diese Funktion kann später implementiert werden
+        self.file_index = {f: i for i, f in enumerate(self.audio_files)}
+        # Anzeigetitel einmalig vorberechnen (Dateiname ohne Endung)
+        self.titles = [self._title_for(f) for f in self.audio_files]
+        # "Alle Songs" zeigt die Titel alphabetisch (für das Sprungregister), nicht nach Pfad
+        self.title_order, self.title_position, self.sorted_titles = self._title_listing(self.titles)
+
+        # Persistenter Index mit Dauer und Tags - für "Interpret" und "Album".
+        # Nur geänderte Dateien werden im Hintergrund neu mit mutagen gelesen.
+        self.library = LibraryIndex(folder)
+        self.scanner = LibraryScanner(folder, workers=scan_workers, use_processes=scan_processes)
+        if start_scan:
+            self.scanner.start()
+        # Neue, gelöschte und umbenannte Dateien ohne Neustart übernehmen
+        self.watcher = LibraryWatcher(folder)
+        if watch:
+            self.watcher.start()
+        # Hüllkurven für die Waveform-Anzeige, einmal pro Titel im Hintergrund berechnet
+        self.analyzer = WaveformAnalyzer(folder) if waveforms else None
+        if self.analyzer:
+            self.analyzer.start()
+        # Cover als fertige RGB565-Vorschaubilder, ebenfalls einmal pro Titel im Hintergrund
+        self.covers = CoverArtCache(folder) if covers else None
+        if self.covers:
+            self.covers.start()
+        # Interpret/Album pro Titel als Spalten, erst beim Öffnen der Menüs aufgebaut
+        self.track_table = None
+        self.track_table_version = None
 
         self.current_index = 0
         self.song_length = 0
         self.start_time = None
         self.paused = False
+        # Zuletzt gemeldete Position und wann sie gemeldet wurde (für Interpolation)
+        self.position = 0.0
+        self.position_stamp = time.monotonic()
+
+        # Vorgeladener nächster Titel: (index, media, mrl)
+        self.preloaded = None
+        # Längen (pro Pfad), die nicht im Index standen, werden im Hintergrund gelesen.
+        # Im selben Thread laufen die Index-Updates des Watchers - nie im VLC-Executor.
+        self.lengths = {}
+        self._length_pool = ThreadPoolExecutor(1)
+
+        # Wiedergabereihenfolge (Zufall, Wiederholen, "Als Nächstes")
+        self.queue = PlayQueue(len(self.audio_files))
+        # Ende der Warteschlange erreicht oder pausiert fortgesetzt: VLC spielt gerade nichts
+        self.stopped = True
+        self.volume = 0.5
+        # Verstärkung des laufenden Titels für gleiche Lautheit (aus dem Index, 1.0 solange nicht gemessen)
+        self.gain = 1.0
+        # Zustand für das Fortsetzen nach dem Neustart, gebündelt geschrieben
+        self.journal = StateJournal(os.path.join(folder, STATE_FILENAME) if persist_state else None)
+        self.saved_state = self.journal.load()
+        self._restore_queue(self.saved_state)
+
+    def _init_vlc(self, vlc_module):
+        try:
+            vlc = vlc_module if vlc_module is not None else importlib.import_module("vlc")
+            instance = vlc.Instance()
+            player = instance.media_player_new()
+            list_player = instance.media_list_player_new()
+            list_player.set_media_player(player)
+
+            player_events = player.event_manager()
+            player_events.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_vlc_event, "end")
+            player_events.event_attach(vlc.EventType.MediaPlayerTimeChanged, self._on_vlc_event, "time")
+            player_events.event_attach(vlc.EventType.MediaPlayerLengthChanged, self._on_vlc_event, "length")
+            player_events.event_attach(vlc.EventType.MediaPlayerEncounteredError, self._on_vlc_event, "error")
+            list_player.event_manager().event_attach(
+                vlc.EventType.MediaListPlayerNextItemSet, self._on_vlc_event, "next_item"
+            )
+            self.vlc = vlc
+            self.vlc_instance = instance
+            self.player = player
+            self.list_player = list_player
+        except Exception as e:
+            self.vlc_error = e
+        finally:
+            self.vlc_ready.set()
+
+    def _wait_vlc(self):
+        """Blockiert, bis libvlc geladen ist (nur beim ersten Zugriff spürbar)."""
+        self.vlc_ready.wait()
+        if self.vlc_error is not None:
+            raise RuntimeError(f"VLC konnte nicht geladen werden: {self.vlc_error}")
 
     def get_audio_length(self, path):
+        try:
+            # mutagen erst bei Bedarf laden, das spart Zeit beim Start
+            from mutagen.mp3 import MP3
+            from mutagen.wave import WAVE
+            from mutagen.flac import FLAC
+        except ImportError:
+            return 180.0
         try:
 			# Hinzufügen der Längenabfrage für FLAC-Dateien
-            if path.lower().endswith('.flac') and FLAC:
+            if path.lower().endswith('.flac'):
                 return FLAC(path).info.length
-            if path.lower().endswith('.mp3') and MP3:
+            if path.lower().endswith('.mp3'):
                 return MP3(path).info.length
-            elif path.lower().endswith('.wav') and WAVE:
+            elif path.lower().endswith('.wav'):
                 return WAVE(path).info.length
         except Exception:
             return 180.0 # Fallback
         return 180.0
 
-    def play_song(self, index):
+    def _on_vlc_event(self, event, kind):
+        # Läuft im VLC-Thread: hier keine libvlc-Aufrufe, nur weiterreichen
+        if kind == "time":
+            self.events.put((kind, event.u.new_time))
+        elif kind == "length":
+            self.events.put((kind, event.u.new_length))
+        else:
+            self.events.put((kind, None))
+
+    def _set_position(self, seconds):
+        self.position = seconds
+        self.position_stamp = time.monotonic()
+
+    def _create_media(self, index):
+        media = self.vlc_instance.media_new(os.path.join(self.folder, self.audio_files[index]))
+        # Asynchron parsen, damit der Wechsel später nichts mehr lesen muss
+        media.parse_with_options(self.vlc.MediaParseFlag.local, -1)
+        return media
+
+    def _request_length(self, index):
+        """Länge aus dem Index, sonst im Hintergrund mit mutagen lesen."""
+        path = self.audio_files[index]
+        if path in self.lengths:
+            return self.lengths[path]
+        length = self.library.get_duration(path)
+        if length:
+            self.lengths[path] = length
+            return length
+        self._length_pool.submit(self._read_length, path)
+        return 0
+
+    def _read_length(self, path):
+        self.lengths[path] = self.get_audio_length(os.path.join(self.folder, path))
+        # Läuft im Hintergrund-Thread: Index und Liste einmal lesen, die Bibliothek kann inzwischen leer sein
+        index, files = self.current_index, self.audio_files
+        if index is not None and index < len(files) and files[index] == path and not self.song_length:
+            self.song_length = self.lengths[path]
+
+    def _restore_queue(self, state):
+        if state.get("repeat") in REPEAT_MODES:
+            self.queue.repeat = state["repeat"]
+        if state.get("shuffle_seed") is not None:
+            self.queue.set_shuffle(True, state["shuffle_seed"])
+        for path in state.get("up_next", []):
+            if path in self.file_index:
+                self.queue.enqueue(self.file_index[path])
+        if isinstance(state.get("volume"), (int, float)):
+            self.volume = max(0.0, min(1.0, state["volume"]))
+
+    def _state(self):
+        return {
+            "track": self.audio_files[self.current_index] if self.start_time is not None else None,
+            "position": round(self.get_current_time(), 1),
+            "paused": self.paused,
+            "volume": self.volume,
+            "shuffle_seed": self.queue.shuffle_seed,
+            "repeat": self.queue.repeat,
+            "up_next": [self.audio_files[i] for i in self.queue.up_next],
+        }
+
+    def save_state(self, urgent=True):
+        """Zustand an das Journal geben; geschrieben wird gebündelt im Hintergrund."""
+        self.journal.update(self._state(), urgent)
+
+    def close(self):
+        self.journal.close()
+
+    def _preload(self, index):
+        """Bereitet Media-Objekt und Länge des nächsten Titels vor und hängt ihn an die Liste."""
+        media = self._create_media(index)
+        self.preloaded = (index, media, media.get_mrl())
+        self._request_length(index)
+        if self.analyzer:
+            self.analyzer.prioritize(self.audio_files[index])
+        self.media_list.lock()
+        self.media_list.add_media(media)
+        self.media_list.unlock()
+
+    def _preload_next(self):
+        if not self.preload_next:
+            return
+        index = self.queue.peek_next(auto=True)
+        # Wiederholen eines Titels läuft über "finished", nicht über die Liste
+        if index is not None and index != self.current_index:
+            self._preload(index)
+
+    def _refresh_preload(self):
+        """Nach Änderungen an der Warteschlange den vorgeladenen Titel austauschen."""
+        if self.media_list is None or self.stopped:
+            return
+        wanted = self.queue.peek_next(auto=True)
+        if self.preloaded is not None:
+            if self.preloaded[0] == wanted:
+                return
+            self.media_list.lock()
+            self.media_list.remove_index(self.media_list.count() - 1)
+            self.media_list.unlock()
+            self.preloaded = None
+        self._preload_next()
+
+    def play_song(self, index, start_time=0.0, from_queue=False):
+        """Spielt einen Titel; from_queue=False heißt direkt gewählt (die Reihenfolge läuft ab hier weiter)."""
+        if not self.audio_files:
+            return None
+        self._wait_vlc()
         self.current_index = index % len(self.audio_files)
-        current_file = self.audio_files[self.current_index]
-        song_path = os.path.join(self.folder, current_file)
-        media = self.vlc_instance.media_new(song_path)
-        self.player.set_media(media)
-        self.player.play()
-        time.sleep(0.2)
-        self.song_length = self.get_audio_length(song_path)
+        if not from_queue:
+            self.queue.set_current(self.current_index)
+        if self.analyzer:
+            self.analyzer.prioritize(self.audio_files[self.current_index])
+        if self.covers:
+            self.covers.prioritize(self.audio_files[self.current_index])
+        if self.preloaded and self.preloaded[0] == self.current_index and not start_time:
+            media = self.preloaded[1]
+        else:
+            media = self._create_media(self.current_index)
+            if start_time:
+                media.add_option(f":start-time={start_time:.1f}")
+        self.preloaded = None
+
+        self.media_list = self.vlc_instance.media_list_new()
+        self.media_list.add_media(media)
+        self.list_player.set_media_list(self.media_list)
+        # Events des vorherigen Titels verwerfen
+        self._drain_events()
+        self.list_player.play_item_at_index(0)
+        self._apply_gain()
+        self._set_position(start_time)
+        self.stopped = False
+        self._preload_next()
+
+        self.song_length = self._request_length(self.current_index)
         self.start_time = time.time()
         self.paused = False
+        self.save_state()
         return self.current_index
 
+    def stop(self):
+        """Ende der Warteschlange: Wiedergabe anhalten, der letzte Titel bleibt ausgewählt."""
+        self._wait_vlc()
+        self.list_player.stop()
+        self.stopped = True
+        self.paused = True
+        self.preloaded = None
+        # Erneutes Abspielen beginnt den letzten Titel von vorn
+        self._set_position(0.0)
+        self.save_state()
+
+    def resume(self):
+        """
+        Setzt den zuletzt gespielten Titel an der gespeicherten Position fort.
+        War er pausiert, bleibt er pausiert, bis pause() aufgerufen wird.
+        Gibt den Index zurück oder None, wenn es nichts fortzusetzen gibt.
+        """
+        track = self.saved_state.get("track")
+        if track not in self.file_index:
+            return None
+        index = self.file_index[track]
+        position = self.saved_state.get("position") or 0.0
+        if not self.saved_state.get("paused"):
+            return self.play_song(index, start_time=position)
+
+        self.current_index = index
+        self.queue.set_current(index)
+        self.song_length = self._request_length(index)
+        self.start_time = time.time()
+        self.stopped = True
+        self.paused = True
+        self._set_position(position)
+        return index
+
+    def _drain_events(self):
+        try:
+            while True:
+                self.events.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _advance_to_preloaded(self):
+        """VLC hat nahtlos zum vorgeladenen Titel gewechselt?"""
+        if self.preloaded is None:
+            return False
+        media = self.player.get_media()
+        if media is None or media.get_mrl() != self.preloaded[2]:
+            return False
+
+        self.current_index = self.preloaded[0]
+        self.queue.advance_to(self.current_index)
+        self.preloaded = None
+        # Kommt erst mit dem nächsten Event-Abruf (PLAYBACK_POLL_INTERVAL) nach dem Wechsel
+        self._apply_gain()
+        self.song_length = self._request_length(self.current_index)
+        self.start_time = time.time()
+        self.paused = False
+        self._set_position(0.0)
+        self._preload_next()
+        self.save_state()
+        return True
+
+    def poll_events(self):
+        """
+        Pro Frame aufrufen: verarbeitet die VLC-Events und gibt eine Liste
+        von "track_changed", "finished" oder "error" zurück.
+        """
+        result = []
+        if not self.vlc_ready.is_set():
+            return result
+        while True:
+            try:
+                kind, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "time":
+                self._set_position(value / 1000.0)
+                # Position landet nur mit dem nächsten regulären Schreiben im Journal
+                self.save_state(urgent=False)
+            elif kind == "length":
+                if value > 0:
+                    self.song_length = value / 1000.0
+            elif kind == "next_item":
+                if self._advance_to_preloaded():
+                    result.append("track_changed")
+            elif kind == "end":
+                # Mit vorgeladenem Nachfolger wechselt VLC selbst weiter
+                if self.preloaded is None:
+                    result.append("finished")
+            elif kind == "error":
+                result.append("error")
+        return result
+
     def pause(self):
+        self._wait_vlc()
+        if self.current_index is None:
+            return
+        if self.stopped:
+            # Nach dem Ende der Warteschlange bzw. pausiert fortgesetzt: an der Position weiterspielen
+            self.play_song(self.current_index, start_time=self.position, from_queue=True)
+            return
         self.player.pause()
         self.paused = not self.paused
         if self.paused:
             self.paused_time = self.player.get_time()
+            self._set_position(self.paused_time / 1000.0)
         else:
             # Kleine Korrektur, falls die Zeit beim Fortsetzen nicht perfekt ist
             self.player.set_time(int(self.paused_time))
+            self._set_position(self.paused_time / 1000.0)
+        self.save_state()
+
+    def _apply_gain(self):
+        """Gespeicherte Lautheit des laufenden Titels übernehmen - nur ein Index-Lookup, keine Analyse."""
+        try:
+            loudness = self.library.get_loudness(self.audio_files[self.current_index]) if self.analyzer else None
+        except sqlite3.OperationalError:
+            # Lieber ohne Angleichung weiterspielen als den Titelwechsel abzubrechen
+            loudness = None
+        self.gain = replay_gain(*loudness) if loudness else 1.0
+        self._update_volume()
+
+    def _update_volume(self):
+        # VLC verstärkt bis 200; der Regler bleibt linear, die Titel-Verstärkung kommt dazu
+        self.player.audio_set_volume(min(200, int(round(self.volume * 100 * self.gain))))
 
     def set_volume(self, volume):
-        self.player.audio_set_volume(int(volume * 100))
+        self._wait_vlc()
+        self.volume = volume
+        self._update_volume()
+        self.save_state()
 
     def get_current_time(self):
-        return self.player.get_time() / 1000.0
+        """Position in Sekunden, aus dem letzten TimeChanged-Event hochgerechnet - ohne libvlc-Aufruf."""
+        if self.paused:
+            return self.position
+        current = self.position + (time.monotonic() - self.position_stamp)
+        if self.song_length > 0:
+            return min(current, self.song_length)
+        return current
 
-    def next_song(self):
-        return self.play_song((self.current_index + 1) % len(self.audio_files))
+    def next_song(self, auto=False):
+        """auto=True: der Titel ist zu Ende gelaufen (Wiederholen gilt), sonst übersprungen."""
+        index = self.queue.next(auto)
+        if index is None:
+            self.stop()
+            return self.current_index
+        return self.play_song(index, from_queue=True)
 
     def previous_song(self):
-        return self.play_song((self.current_index - 1) % len(self.audio_files))
-        
-    def is_finished(self):
-        # vlc.State.Ended hat den Wert 6
-        return self.player.get_state() == vlc.State.Ended
-
-    # --- ZUKüNFTIGE FUNKTION für Interpret/Album ---
-    # def _load_metadata(self):
-    #     for file in self.audio_files:
-    #         # Lade hier Metadaten mit mutagen und speichere sie
-    #         pass
+        return self.play_song(self.queue.previous(), from_queue=True)
+
+    def enqueue(self, index):
+        """Titel in "Als Nächstes" einreihen."""
+        self.queue.enqueue(index)
+        self._refresh_preload()
+        self.save_state()
+
+    def set_shuffle(self, enabled):
+        self.queue.set_shuffle(enabled)
+        self._refresh_preload()
+        self.save_state()
+
+    def cycle_repeat(self):
+        mode = self.queue.cycle_repeat()
+        self._refresh_preload()
+        self.save_state()
+        return mode
+
+    @staticmethod
+    def _title_for(path):
+        return os.path.splitext(os.path.basename(path))[0]
+
+    @staticmethod
+    def _title_listing(titles):
+        """
+        (order, position, sorted_titles) für "Alle Songs": Indizes sortiert nach
+        Titel ohne Groß- und Kleinschreibung (bei Gleichstand nach Pfad), die
+        Position jedes Index in dieser Reihenfolge und die Titel darin.
+        """
+        order = sorted(range(len(titles)), key=lambda index: titles[index].casefold())
+        position = [0] * len(order)
+        for pos, index in enumerate(order):
+            position[index] = pos
+        return order, position, [titles[index] for index in order]
+
+    def poll_library_changes(self):
+        """
+        Holt die Änderungen des Watchers ab. Gibt None zurück, wenn sich die
+        Songliste nicht geändert hat, sonst die vorbereiteten Listen für
+        swap_library(). Die Listen des Players bleiben hier unverändert.
+        """
+        added = set()
+        removed = set()
+        while True:
+            try:
+                batch_added, batch_removed = self.watcher.changes.get_nowait()
+            except queue.Empty:
+                break
+            added.difference_update(batch_removed)
+            removed.update(batch_removed)
+            removed.difference_update(batch_added)
+            added.update(batch_added)
+        if not added and not removed:
+            return None
+        return self.prepare_library_changes(added, removed)
+
+    def prepare_library_changes(self, added, removed):
+        """
+        Baut die Songliste mit neuen (sortiert eingefügten) und ohne entfernte
+        Titel auf. Gibt (files, titles, file_index, listing, remap) oder None
+        zurück; listing ist _title_listing(titles), remap bildet alte auf neue Indizes ab (None für entfernte Titel).
+        """
+        removed = [path for path in removed if path in self.file_index]
+        new = sorted(path for path in added if path not in self.file_index)
+
+        # Index im Hintergrund nachziehen (Tags auch für geänderte Dateien)
+        if removed or added:
+            self._length_pool.submit(self._update_library, removed, sorted(added))
+        for path in added:
+            self.lengths.pop(path, None)
+        if not removed and not new:
+            return None
+
+        # Neue Listen aufbauen; getauscht wird erst in swap_library - die UI zeichnet parallel aus den alten
+        old_files = self.audio_files
+        files = list(old_files)
+        titles = list(self.titles)
+        for index in sorted((self.file_index[path] for path in removed), reverse=True):
+            del files[index]
+            del titles[index]
+        for path in new:
+            index = bisect.bisect_left(files, path)
+            files.insert(index, path)
+            titles.insert(index, self._title_for(path))
+        file_index = {f: i for i, f in enumerate(files)}
+
+        def remap(old_index):
+            return file_index.get(old_files[old_index])
+
+        return files, titles, file_index, self._title_listing(titles), remap
+
+    def swap_library(self, files, titles, file_index, listing, remap):
+        """
+        Übernimmt die vorbereiteten Listen, ohne die Wiedergabe zu unterbrechen.
+        Ruft libvlc nicht auf: Die App tauscht auf der Event-Loop im selben
+        Schritt wie die Indizes des Menüs, danach folgt finish_library_swap()
+        im VLC-Executor. Gibt remap zurück.
+        """
+        current_path = self.audio_files[self.current_index] if self.current_index is not None else None
+        self.audio_files = files
+        self.titles = titles
+        self.file_index = file_index
+        self.title_order, self.title_position, self.sorted_titles = listing
+
+        # Der laufende Titel spielt weiter; wurde er gelöscht, geht es danach mit dem folgenden weiter
+        if current_path in file_index:
+            self.current_index = file_index[current_path]
+        elif files and current_path is not None:
+            self.current_index = bisect.bisect_left(files, current_path) % len(files)
+        elif files:
+            # Nach einer leeren Bibliothek wieder beim ersten Titel anfangen
+            self.current_index = 0
+        else:
+            self.current_index = None
+        self.queue.remap(remap, len(files))
+        if files and self.queue.current is None:
+            self.queue.set_current(self.current_index)
+        if self.preloaded is not None:
+            # Ein gelöschter vorgeladener Titel (None) wird in _refresh_preload ersetzt
+            self.preloaded = (remap(self.preloaded[0]),) + self.preloaded[1:]
+        return remap
+
+    def finish_library_swap(self):
+        """Nach swap_library: VLC anhalten bzw. den vorgeladenen Titel anpassen."""
+        if not self.audio_files:
+            self._stop_empty()
+        elif self.preloaded is not None:
+            self._refresh_preload()
+
+    def _update_library(self, removed, added):
+        try:
+            if removed:
+                self.library.remove_files(removed)
+            if added:
+                self.library.update_files(added)
+        except sqlite3.OperationalError as e:
+            print(f"Bibliotheks-Index nicht aktualisiert: {e}")
+
+    def _stop_empty(self):
+        """Alle Titel wurden gelöscht: Wiedergabe beenden, es gibt keinen aktuellen Titel mehr."""
+        if self.vlc_ready.is_set() and self.list_player is not None:
+            self.list_player.stop()
+        self.media_list = None
+        self.preloaded = None
+        self.stopped = True
+        self.paused = True
+        self.song_length = 0
+        self.start_time = None
+        self._set_position(0.0)
+        self.save_state()
+
+    def get_waveform(self, index):
+        """(peaks, rms) des Titels aus dem Index; None, solange er nicht analysiert ist, () ohne Hüllkurve."""
+        if self.analyzer is None:
+            return ()
+        return self.library.get_waveform(self.audio_files[index])
+
+    def get_cover(self, index):
+        """Cover des Titels als RGB565-Array (COVER_SIZE x COVER_SIZE); None, solange es nicht extrahiert ist, False ohne Cover."""
+        if self.covers is None:
+            return False
+        key = self.library.get_cover(self.audio_files[index])
+        if key is None:
+            return None
+        pixels = self.covers.load(key)
+        return pixels if pixels is not None else False
+
+    def get_track_table(self):
+        """
+        TrackTable zur aktuellen Songliste. Neu aufgebaut wird nur, wenn sich
+        die Liste oder der Index geändert hat (Scanner-Fortschritt, Watcher).
+        Kann dauern - die App ruft das im vlc_executor auf.
+        """
+        version = (id(self.audio_files), self.scanner.done, self.scanner.running, self.library.changes)
+        if self.track_table is None or version != self.track_table_version:
+            self.track_table = TrackTable.from_index(self.library, self.file_index)
+            self.track_table_version = version
+        return self.track_table
+
+    def get_browse_items(self, kind):
+        """Namen aller Interpreten (kind "artist") oder Alben ("album")."""
+        table = self.get_track_table()
+        return (table.artists if kind == "artist" else table.albums).strings
+
+    def get_track_indices(self, kind, name):
+        """Indizes in audio_files für einen Interpreten (kind "artist") oder ein Album ("album")."""
+        table = self.get_track_table()
+        if kind == "artist":
+            return table.tracks_of_artist(name)
+        return table.tracks_of_album(name)
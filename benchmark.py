@@ -0,0 +1,230 @@
+"""
+Headless-Benchmark: spielt eine feste Eingabe-Aufzeichnung gegen die echte
+MenuStateMachine, UserInterface und DisplayController ab - mit den
+Attrappen aus sim_backends statt ST7735, Seesaw und VLC.
+
+    python benchmark.py --sizes 10 1000 100000 --spi-hz 16000000
+
+Gemessen werden Render- und Umwandlungszeit, Bytes pro Frame (inkl.
+rechnerischer SPI-Zeit) und die Latenz von der Eingabe bis zum fertig
+übertragenen Frame.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+from app import MenuStateMachine
+from audio_player import AudioPlayer
+from display_controller import DisplayController, DEFAULT_SPI_SPEED_HZ
+from frame_scheduler import FrameScheduler
+from seesaw_input import SeesawInput
+from sim_backends import FakeClock, FakeGpio, FakeSpiBus, FakeVlc, ScriptedSeesaw
+from user_interface import UserInterface
+
+WIDTH, HEIGHT = 160, 128
+TICK = 0.005  # Simulierter Takt der Eingabe-Abfrage
+
+
+def make_library(folder, count):
+    """Legt count leere Audio-Dateien an (nur Namen, Tags werden nicht gelesen)."""
+    for i in range(count):
+        # Die laufende Nummer vorne, damit sich benachbarte Zeilen auch im sichtbaren Teil unterscheiden
+        name = f"{i:06d} Interpret {i % 97:02d} - Ein ziemlich langer Titel.mp3"
+        open(os.path.join(folder, name), "wb").close()
+
+
+def default_trace():
+    """Menü öffnen, durch die Songliste scrollen, Titel starten, Lautstärke, zurück."""
+    trace = []
+
+    def click(t, button):
+        trace.append((t, button, True))
+        trace.append((t + 0.08, button, False))
+
+    click(0.2, "select")    # Hauptmenü -> Musik
+    click(0.6, "select")    # Musik -> Alle Songs
+    for step in range(100): # Scrollen in der Liste
+        trace.append((1.0 + step * 0.04, "encoder", 1))
+    click(5.2, "select")    # Titel abspielen
+    for step in range(10):  # Lautstärke
+        trace.append((6.0 + step * 0.1, "encoder", -1))
+    click(8.0, "up")        # zurück zur Liste
+    for step in range(20):
+        trace.append((8.5 + step * 0.04, "encoder", -1))
+    return trace
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(values, scale=1000.0):
+    return {
+        "mean": statistics.fmean(values) * scale if values else 0.0,
+        "p95": percentile(values, 0.95) * scale,
+        "max": max(values) * scale if values else 0.0,
+    }
+
+
+def run(count, duration, spi_hz, max_fps, trace, palette_mode=False):
+    folder = tempfile.mkdtemp(prefix="mp3bench_")
+    try:
+        make_library(folder, count)
+        clock = FakeClock()
+        vlc = FakeVlc(clock)
+
+        start = time.perf_counter()
+        player = AudioPlayer(folder, vlc_module=vlc, start_scan=False, watch=False, waveforms=False, covers=False, persist_state=False)
+        setup_time = time.perf_counter() - start
+
+        spi = FakeSpiBus()
+        display = DisplayController(WIDTH, HEIGHT, 24, 25, spi_speed_hz=spi_hz, spi=spi, gpio=FakeGpio())
+        seesaw = ScriptedSeesaw(trace, clock)
+        seesaw_input = SeesawInput(device=seesaw, encoder=seesaw)
+        ui = UserInterface(WIDTH, HEIGHT, palette_mode=palette_mode)
+        machine = MenuStateMachine(player, ui, WIDTH, HEIGHT)
+        scheduler = FrameScheduler(max_fps=max_fps)
+        screen = ui.create_surface((WIDTH, HEIGHT))
+
+        render_times = []
+        convert_times = []
+        flush_times = []
+        frame_bytes = []
+        bus_times = []
+        latencies = []
+        palette_sent = None
+        pending_input = None  # Simulierte Zeit der ältesten noch nicht angezeigten Eingabe
+
+        while clock() < duration:
+            now = clock()
+            vlc.update()
+
+            events = seesaw_input.poll(now)
+            delta = seesaw_input.get_encoder_delta()
+            commands = []
+            if delta:
+                commands += machine.handle_encoder(delta, seesaw_input.get_encoder_speed(now))
+            for button, action in events:
+                commands += machine.handle_button(button, action)
+            if delta or events:
+                scheduler.mark_dirty()
+                if pending_input is None:
+                    pending_input = now
+
+            for playback_event in player.poll_events():
+                commands += machine.handle_playback_event(playback_event)
+                scheduler.mark_dirty()
+            for command in commands:
+                name = command[0]
+                if name == "play":
+                    machine.song_started(player.play_song(command[1]))
+                elif name == "next":
+                    machine.song_started(player.next_song())
+                elif name == "advance":
+                    machine.song_started(player.next_song(True))
+                elif name == "previous":
+                    machine.song_started(player.previous_song())
+                elif name == "pause":
+                    player.pause()
+                elif name == "volume":
+                    player.set_volume(command[1])
+                elif name == "enqueue":
+                    player.enqueue(command[1])
+
+            machine.update(now, scheduler)
+            if palette_mode and ui.palette is not palette_sent:
+                # Wie App._sync_palette: bei Theme-Wechseln nur die Tabelle tauschen
+                display.set_palette(ui.palette)
+                palette_sent = ui.palette
+            if scheduler.should_render(now):
+                t0 = time.perf_counter()
+                machine.render(screen)
+                t1 = time.perf_counter()
+                color = display.convert_surface(screen)
+                t2 = time.perf_counter()
+                bus_before = spi.bus_time
+                display.flush(color)
+                t3 = time.perf_counter()
+                scheduler.frame_rendered(now)
+
+                bus_time = spi.bus_time - bus_before
+                render_times.append(t1 - t0)
+                convert_times.append(t2 - t1)
+                flush_times.append(t3 - t2)
+                frame_bytes.append(display.stats["bytes_last_frame"])
+                bus_times.append(bus_time)
+                if pending_input is not None:
+                    # Wartezeit bis zum Frame + Rechenzeit + Übertragung auf dem Bus
+                    latencies.append(now - pending_input + (t3 - t0) + bus_time)
+                    pending_input = None
+
+            clock.advance(TICK)
+
+        player._length_pool.shutdown(wait=False)
+        player.library.close()
+        return {
+            "tracks": count,
+            "setup_ms": setup_time * 1000,
+            "frames": len(render_times),
+            "frames_skipped": display.stats["skipped_frames"],
+            "render_ms": summarize(render_times),
+            "convert_ms": summarize(convert_times),
+            "flush_ms": summarize(flush_times),
+            "bus_ms": summarize(bus_times),
+            "bytes_per_frame": display.get_bytes_per_frame(),
+            "bytes_max": max(frame_bytes) if frame_bytes else 0,
+            "full_frame_bytes": WIDTH * HEIGHT * 2,
+            "latency_ms": summarize(latencies),
+        }
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def print_result(result):
+    print(f"--- {result['tracks']} Titel ---")
+    print(f"  Start AudioPlayer: {result['setup_ms']:.1f} ms")
+    print(f"  Frames: {result['frames']} (davon ohne Änderung: {result['frames_skipped']})")
+    for key, label in (("render_ms", "Rendern"), ("convert_ms", "RGB565"), ("flush_ms", "Flush"),
+                       ("bus_ms", "SPI-Bus"), ("latency_ms", "Eingabe->Frame")):
+        values = result[key]
+        print(f"  {label:15s} mean {values['mean']:7.3f} ms  p95 {values['p95']:7.3f} ms  max {values['max']:7.3f} ms")
+    print(f"  Bytes/Frame: mean {result['bytes_per_frame']:.0f}, max {result['bytes_max']} von {result['full_frame_bytes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless-Benchmark des Mp3-Players")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000, 100000],
+                        help="Anzahl Titel der synthetischen Bibliotheken")
+    parser.add_argument("--duration", type=float, default=10.0, help="Simulierte Laufzeit in Sekunden")
+    parser.add_argument("--spi-hz", type=int, default=DEFAULT_SPI_SPEED_HZ)
+    parser.add_argument("--max-fps", type=int, default=30)
+    parser.add_argument("--palette", action="store_true", help="8-Bit-Palettenmodus statt RGB-Surfaces")
+    parser.add_argument("--json", metavar="DATEI", help="Ergebnisse zusätzlich als JSON speichern")
+    args = parser.parse_args()
+
+    pygame.init()
+    trace = default_trace()
+    results = []
+    for count in args.sizes:
+        result = run(count, args.duration, args.spi_hz, args.max_fps, trace, args.palette)
+        print_result(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import hashlib
+import io
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from library_index import LibraryIndex
+from waveform import _lower_priority
+
+# Kantenlänge der Vorschaubilder; passt zwischen Zeitanzeige und Icons im Play-Screen
+COVER_SIZE = 32
+COVER_DIRNAME = ".covers"
+# Bilder im Ordner des Titels, falls die Datei selbst keines enthält
+FOLDER_IMAGES = ("cover.jpg", "cover.png", "folder.jpg", "folder.png", "front.jpg", "front.png")
+# So viele Vorschaubilder bleiben gemappt
+MEMORY_COVERS = 32
+IDLE_INTERVAL = 10.0
+BATCH_SIZE = 20
+# So oft im Leerlauf nach Vorschaubildern suchen, die kein Titel mehr verwendet
+PRUNE_INTERVAL = 600.0
+
+
+def _embedded_picture(path):
+    """Bilddaten aus den Tags (ID3 APIC, FLAC-Picture), bevorzugt das Frontcover."""
+    try:
+        import mutagen
+        audio = mutagen.File(path)
+    except Exception:
+        return None
+    if audio is None:
+        return None
+    pictures = list(getattr(audio, "pictures", None) or [])
+    tags = audio.tags
+    if tags is not None and hasattr(tags, "getall"):
+        pictures += tags.getall("APIC")
+    if not pictures:
+        return None
+    # Typ 3 = Frontcover
+    pictures.sort(key=lambda picture: getattr(picture, "type", 0) != 3)
+    return pictures[0].data
+
+
+def _folder_picture(path):
+    folder = os.path.dirname(path)
+    try:
+        names = {name.lower(): name for name in os.listdir(folder)}
+    except OSError:
+        return None
+    for candidate in FOLDER_IMAGES:
+        if candidate in names:
+            try:
+                with open(os.path.join(folder, names[candidate]), "rb") as f:
+                    return f.read()
+            except OSError:
+                pass
+    return None
+
+
+def to_rgb565(pixels):
+    """(Höhe, Breite, 3)-RGB-Array als RGB565 in der Byte-Reihenfolge des ST7735 (Big Endian)."""
+    pixels = pixels.astype(np.uint16)
+    color = ((pixels[:, :, 0] & 0xF8) << 8) | ((pixels[:, :, 1] & 0xFC) << 3) | (pixels[:, :, 2] >> 3)
+    return color.astype('>u2')
+
+
+def render_thumbnail(data, size=COVER_SIZE):
+    """Dekodiert ein Bild, schneidet es quadratisch zu und verkleinert es. None bei Fehlern."""
+    import pygame
+    try:
+        image = pygame.image.load(io.BytesIO(data))
+    except (pygame.error, ValueError):
+        return None
+    width, height = image.get_size()
+    side = min(width, height)
+    if side == 0:
+        return None
+    # Mittig zuschneiden, damit das Quadrat ganz gefüllt ist
+    square = pygame.Surface((side, side), 0, 32)
+    square.blit(image, (0, 0), ((width - side) // 2, (height - side) // 2, side, side))
+    thumbnail = pygame.transform.smoothscale(square, (size, size))
+    return to_rgb565(pygame.surfarray.array3d(thumbnail).transpose(1, 0, 2))
+
+
+def cover_filename(key):
+    return f"{key}-{COVER_SIZE}.rgb565"
+
+
+def extract_cover(path, cover_dir):
+    """
+    Läuft im Worker-Prozess. Schreibt das Vorschaubild (falls noch nicht
+    vorhanden) und gibt seinen Schlüssel zurück, "" ohne Bild. Der Schlüssel
+    ist ein Hash der Bilddaten, alle Titel eines Albums teilen sich eine Datei.
+    """
+    data = _embedded_picture(path) or _folder_picture(path)
+    if not data:
+        return ""
+    key = hashlib.sha1(data).hexdigest()[:20]
+    target = os.path.join(cover_dir, cover_filename(key))
+    if os.path.exists(target):
+        return key
+    thumbnail = render_thumbnail(data)
+    if thumbnail is None:
+        return ""
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(thumbnail.tobytes())
+    os.replace(tmp_path, target)
+    return key
+
+
+class CoverArtCache:
+    """
+    Extrahiert im Hintergrund das Cover jedes Titels genau einmal und legt es
+    bereits verkleinert und im RGB565-Format des Displays unter .covers ab.
+    Angezeigt wird per mmap ohne Dekodieren oder Umrechnen; die zuletzt
+    benutzten MEMORY_COVERS Bilder bleiben gemappt (LRU). Nicht mehr
+    verwendete Dateien räumt prune() im Leerlauf weg.
+    """
+
+    def __init__(self, folder, db_path=None, workers=1, memory_covers=MEMORY_COVERS):
+        self.folder = folder
+        self.db_path = db_path
+        self.cover_dir = os.path.join(folder, COVER_DIRNAME)
+        self.workers = max(1, workers)
+        self.memory_covers = memory_covers
+        self.loaded = OrderedDict()
+        self.priority = deque()
+        self.extracted = 0
+        self.pruned = 0
+        self.thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def start(self):
+        os.makedirs(self.cover_dir, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="covers", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self.thread:
+            self.thread.join()
+
+    def prioritize(self, path):
+        """Cover dieses Titels als nächstes extrahieren."""
+        self.priority.append(path)
+        self._wake.set()
+
+    def load(self, key):
+        """Vorschaubild als (COVER_SIZE, COVER_SIZE)-Array ('>u2') auf der gemappten Datei, None ohne Bild."""
+        if not key:
+            return None
+        pixels = self.loaded.get(key)
+        if pixels is not None:
+            self.loaded.move_to_end(key)
+            return pixels
+        try:
+            with open(os.path.join(self.cover_dir, cover_filename(key)), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(mapped) != COVER_SIZE * COVER_SIZE * 2:
+            mapped.close()
+            return None
+        pixels = np.frombuffer(mapped, dtype='>u2').reshape(COVER_SIZE, COVER_SIZE)
+        self.loaded[key] = pixels
+        # Die Zuordnung wird frei, sobald niemand mehr das Array hält
+        while len(self.loaded) > self.memory_covers:
+            self.loaded.popitem(last=False)
+        return pixels
+
+    def _next_batch(self, index):
+        batch = []
+        while self.priority:
+            path = self.priority.popleft()
+            if index.get_cover(path) is None:
+                try:
+                    batch.append((path, os.stat(os.path.join(self.folder, path)).st_mtime))
+                except OSError:
+                    pass
+        seen = {path for path, _ in batch}
+        batch += [row for row in index.missing_covers(BATCH_SIZE) if row[0] not in seen]
+        return batch
+
+    def prune(self, index):
+        """Löscht Vorschaubilder, auf die kein Titel mehr verweist (gelöschte oder geänderte Dateien)."""
+        try:
+            used = index.cover_keys()
+            names = os.listdir(self.cover_dir)
+        except (sqlite3.OperationalError, OSError) as e:
+            print(f"Cover-Verzeichnis nicht aufgeräumt: {e}")
+            return
+        suffix = cover_filename("")
+        for name in names:
+            # Reste abgebrochener Worker (.tmp) fallen mit weg
+            if name.endswith(".tmp") or (name.endswith(suffix) and name[:-len(suffix)] not in used):
+                try:
+                    os.remove(os.path.join(self.cover_dir, name))
+                    self.pruned += 1
+                except OSError:
+                    pass
+
+    def _run(self):
+        index = LibraryIndex(self.folder, self.db_path)
+        context = multiprocessing.get_context("fork")
+        last_prune = None
+        try:
+            with ProcessPoolExecutor(self.workers, mp_context=context, initializer=_lower_priority) as pool:
+                while not self._stop.is_set():
+                    batch = self._next_batch(index)
+                    if not batch:
+                        # Nur im Leerlauf aufräumen, dann schreibt kein Worker gerade ein neues Bild
+                        if last_prune is None or time.monotonic() - last_prune >= PRUNE_INTERVAL:
+                            self.prune(index)
+                            last_prune = time.monotonic()
+                        self._wake.wait(IDLE_INTERVAL)
+                        self._wake.clear()
+                        continue
+
+                    in_flight = {}
+                    for path, mtime in batch:
+                        if self._stop.is_set():
+                            break
+                        future = pool.submit(extract_cover, os.path.join(self.folder, path), self.cover_dir)
+                        in_flight[future] = (path, mtime)
+                        while len(in_flight) >= self.workers * 2:
+                            self._collect(index, in_flight)
+                    while in_flight and not self._stop.is_set():
+                        self._collect(index, in_flight)
+                    for future in in_flight:
+                        future.cancel()
+        finally:
+            index.close()
+
+    def _collect(self, index, in_flight):
+        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in finished:
+            path, mtime = in_flight.pop(future)
+            try:
+                key = future.result()
+            except Exception:
+                key = ""
+            # Sofort committen, damit keine Schreibtransaktion über die ganze Extraktion offen bleibt
+            with index.lock:
+                try:
+                    index.store_cover(path, mtime, key)
+                    index.conn.commit()
+                except sqlite3.OperationalError as e:
+                    index.conn.rollback()
+                    print(f"Cover von {path} nicht gespeichert: {e}")
+            self.extracted += 1
@@ -1,13 +1,188 @@
 import time
-import spidev
-import lgpio
 import numpy as np
 import pygame
 
-class DisplayController:
-    def __init__(self, width, height, dc_pin, reset_pin):
+# Laut Datenblatt schafft der ST7735 im Schreibmodus ca. 15 MHz. Viele Module
+# laufen stabil deutlich darüber - höhere Takte (bis MAX_SPI_SPEED_HZ) nur explizit
+DEFAULT_SPI_SPEED_HZ = 15000000
+MIN_SPI_SPEED_HZ = 500000
+MAX_SPI_SPEED_HZ = 32000000
+
+# Wartezeiten beim Init laut ST7735-Datenblatt (Minimalwerte)
+RESET_PULSE_TIME = 0.00001  # RESX low mindestens 10 us
+RESET_TIME = 0.12           # nach dem Reset bis zu 120 ms, bevor Befehle angenommen werden
+SLEEP_OUT_TIME = 0.005      # nach SLPOUT 5 ms bis zum nächsten Befehl
+
+
+class LgpioPins:
+    """GPIO-Zugriff über lgpio (Standard auf dem Pi)."""
+
+    def __init__(self, chip=0):
+        import lgpio
+        self.lgpio = lgpio
+        self.h = lgpio.gpiochip_open(chip)
+
+    def claim_output(self, pin):
+        self.lgpio.gpio_claim_output(self.h, pin)
+
+    def write(self, pin, value):
+        self.lgpio.gpio_write(self.h, pin, value)
+
+
+def open_spidev(bus=0, device=0):
+    import spidev
+    spi = spidev.SpiDev()
+    spi.open(bus, device)
+    return spi
+
+
+class Rgb565Display:
+    """
+    Gemeinsamer Teil der Display-Backends: wandelt Surfaces bzw. RGB- oder
+    Index-Arrays in self.frame (RGB565 in der Byte-Reihenfolge des Backends)
+    um und ermittelt die geänderten Bereiche. Die Übertragung (flush) ist
+    Sache der Unterklasse.
+    """
+
+    def __init__(self, width, height, frame_dtype):
         self.width = width
         self.height = height
+        # Vorab allokierte Puffer, damit pro Frame keine neuen Arrays entstehen
+        self.frame = np.zeros((height, width), dtype=frame_dtype)
+        self.last_frame = None
+        self.has_last_frame = False
+        self._work = np.empty((height, width), dtype=np.uint16)
+        self._channel = np.empty((height, width), dtype=np.uint16)
+        self._changed = np.empty((height, width), dtype=bool)
+        # RGB565-Tabelle für 8-Bit-Frames (Palettenmodus), siehe set_palette()
+        self.lut = np.zeros(256, dtype=frame_dtype)
+        # Fertiges RGB565-Bild (Cover), das nach der Umwandlung eingesetzt wird: (Pixel, (x, y))
+        self.overlay = None
+        self.merge_gap = 0
+        self.stats = {
+            "frames": 0,
+            "full_flushes": 0,
+            "partial_flushes": 0,
+            "skipped_frames": 0,
+            "bytes_last_frame": 0,
+            "bytes_total": 0,
+        }
+
+    def convert_pixels(self, pixels):
+        """Wandelt ein (Höhe, Breite, >=3)-RGB-Array in self.frame (RGB565) um."""
+        work = self._work
+        channel = self._channel
+
+        np.copyto(work, pixels[:, :, 0])
+        work &= 0xF8
+        work <<= 8
+        np.copyto(channel, pixels[:, :, 1])
+        channel &= 0xFC
+        channel <<= 3
+        work |= channel
+        np.copyto(channel, pixels[:, :, 2])
+        channel >>= 3
+        work |= channel
+
+        # Beim Kopieren in ein Big-Endian-Array wird automatisch getauscht
+        np.copyto(self.frame, work)
+        return self.frame
+
+    def set_palette(self, colors):
+        """Setzt die Farben für 8-Bit-Frames: bis zu 256 RGB-Tupel, Index = Pixelwert."""
+        rgb = np.zeros((256, 3), dtype=np.uint16)
+        rgb[:len(colors)] = [tuple(color)[:3] for color in colors]
+        self.lut[:] = ((rgb[:, 0] & 0xF8) << 8) | ((rgb[:, 1] & 0xFC) << 3) | (rgb[:, 2] >> 3)
+
+    def convert_indices(self, indices):
+        """Wandelt ein (Höhe, Breite)-Array aus Paletten-Indizes per Tabellen-Lookup in self.frame um."""
+        # Ein Gather statt drei Kanäle maskieren und schieben; lut hat schon die Byte-Reihenfolge von frame
+        np.take(self.lut, indices, out=self.frame)
+        return self.frame
+
+    def set_overlay(self, pixels, position=(0, 0)):
+        """
+        Setzt ein (Höhe, Breite)-Array aus RGB565-Werten, das in jeden Frame
+        kopiert wird, ohne durch die Surface und die Umwandlung zu gehen.
+        None entfernt es wieder.
+        """
+        self.overlay = None if pixels is None else (pixels, position)
+
+    def draw_overlay(self, color):
+        if self.overlay is not None:
+            pixels, (x, y) = self.overlay
+            height, width = pixels.shape
+            # copyto tauscht die Bytes, falls das Backend Little Endian benutzt
+            np.copyto(color[y:y + height, x:x + width], pixels)
+        return color
+
+    def convert_surface(self, screen):
+        """Wandelt die Surface direkt aus der Pixel-Sicht in self.frame um."""
+        if screen.get_bytesize() == 1:
+            # get_view ist deutlich billiger als surfarray.pixels2d
+            view = screen.get_view('2')
+            color = self.convert_indices(np.asarray(view).T)
+            del view
+            return color
+        # pixels3d liefert eine Sicht (Breite, Höhe, 3) ohne Kopie
+        view = pygame.surfarray.pixels3d(screen).transpose(1, 0, 2)
+        color = self.convert_pixels(view)
+        # Sicht freigeben, sonst bleibt die Surface gesperrt
+        del view
+        return color
+
+    def update_display(self, screen):
+        self.flush(self.draw_overlay(self.convert_surface(screen)))
+
+    def update_pixels(self, pixels):
+        """Wie update_display, aber direkt aus einem RGB-Array (z.B. Shared Memory)."""
+        self.flush(self.draw_overlay(self.convert_pixels(pixels)))
+
+    def update_indices(self, indices):
+        """Wie update_pixels, aber aus einem Array von Paletten-Indizes."""
+        self.flush(self.draw_overlay(self.convert_indices(indices)))
+
+    def flush(self, color):
+        """Bringt color (== self.frame) auf das Display; je nach Backend."""
+        raise NotImplementedError
+
+    def get_dirty_rects(self, color):
+        """Liefert die geänderten Bereiche als Liste von (x0, y0, x1, y1)."""
+        if not self.has_last_frame:
+            return [(0, 0, self.width - 1, self.height - 1)]
+
+        changed = np.not_equal(color, self.last_frame, out=self._changed)
+        rows = np.flatnonzero(changed.any(axis=1))
+        if rows.size == 0:
+            return []
+
+        # Benachbarte geänderte Zeilen zu Bändern zusammenfassen
+        breaks = np.flatnonzero(np.diff(rows) > self.merge_gap + 1)
+        starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+        ends = np.concatenate((rows[breaks], [rows[-1]]))
+
+        rects = []
+        for y0, y1 in zip(starts, ends):
+            cols = np.flatnonzero(changed[y0:y1 + 1].any(axis=0))
+            rects.append((int(cols[0]), int(y0), int(cols[-1]), int(y1)))
+        return rects
+
+    def get_bytes_per_frame(self):
+        """Durchschnittliche Anzahl gesendeter Pixel-Bytes pro Frame."""
+        if self.stats["frames"] == 0:
+            return 0
+        return self.stats["bytes_total"] / self.stats["frames"]
+
+
+class DisplayController(Rgb565Display):
+    def __init__(self, width, height, dc_pin, reset_pin, spi_speed_hz=DEFAULT_SPI_SPEED_HZ, spi=None, gpio=None):
+        """
+        spi und gpio sind austauschbar (z.B. sim_backends.FakeSpiBus/FakeGpio),
+        ohne Angabe werden spidev und lgpio benutzt.
+        """
+        if not isinstance(spi_speed_hz, int) or not MIN_SPI_SPEED_HZ <= spi_speed_hz <= MAX_SPI_SPEED_HZ:
+            raise ValueError(f"SPI-Takt muss zwischen {MIN_SPI_SPEED_HZ} und {MAX_SPI_SPEED_HZ} Hz liegen, nicht {spi_speed_hz!r}")
+        super().__init__(width, height, '>u2')
         self.dc_pin = dc_pin
         self.reset_pin = reset_pin
 
@@ -22,22 +197,32 @@ class DisplayController:
         self.RAMWR   = 0x2C  
 
         # SPI und GPIO initialisieren
-        self.spi = spidev.SpiDev()
-        self.spi.open(0, 0)
-        self.spi.max_speed_hz = 4000000  
+        self.spi = spi if spi is not None else open_spidev(0, 0)
+        self.spi.max_speed_hz = spi_speed_hz
         self.spi.mode = 0b00
 
-        self.h = lgpio.gpiochip_open(0)
-        lgpio.gpio_claim_output(self.h, self.dc_pin)
-        lgpio.gpio_claim_output(self.h, self.reset_pin)
+        self.gpio = gpio if gpio is not None else LgpioPins(0)
+        self.gpio.claim_output(self.dc_pin)
+        self.gpio.claim_output(self.reset_pin)
+
+        # frame/last_frame liegen bereits im Big-Endian-Format des Panels vor
+        self.last_frame = np.zeros((height, width), dtype='>u2')
+        # DISPON erst mit dem ersten Frame, damit kein zufälliger RAM-Inhalt sichtbar wird
+        self.display_on = False
+        self._scratch = np.empty(width * height, dtype='>u2')
+        # Ab diesem Anteil geänderter Pixel wird das ganze Bild gesendet
+        self.full_flush_ratio = 0.6
+        # Zeilenlücken bis zu dieser Größe werden zu einem Rechteck zusammengefasst,
+        # weil jedes Fenster (CASET/RASET/RAMWR) eigenen Overhead kostet
+        self.merge_gap = 4
 
         self.init_display()
 
     def send_command(self, cmd, data=None):
-        lgpio.gpio_write(self.h, self.dc_pin, 0)  # Befehl-Modus
+        self.gpio.write(self.dc_pin, 0)  # Befehl-Modus
         self.spi.xfer([cmd])
         if data is not None:
-            lgpio.gpio_write(self.h, self.dc_pin, 1)  # Daten-Modus
+            self.gpio.write(self.dc_pin, 1)  # Daten-Modus
             self.spi.xfer(data)
 
     def set_rotation(self, rotation):
@@ -45,41 +230,64 @@ class DisplayController:
         self.send_command(self.MADCTL, [rotations[rotation % 4]])
 
     def set_window(self, x0, y0, x1, y1):
-        self.send_command(self.CASET, [0x00, x0, 0x00, x1])
-        self.send_command(self.RASET, [0x00, y0, 0x00, y1])
+        self.send_command(self.CASET, [x0 >> 8, x0 & 0xFF, x1 >> 8, x1 & 0xFF])
+        self.send_command(self.RASET, [y0 >> 8, y0 & 0xFF, y1 >> 8, y1 & 0xFF])
         self.send_command(self.RAMWR)
 
     def init_display(self):
-        # Hardware-Reset
-        lgpio.gpio_write(self.h, self.reset_pin, 0)
-        time.sleep(0.1)
-        lgpio.gpio_write(self.h, self.reset_pin, 1)
-        time.sleep(0.1)
-
-        self.send_command(self.SWRESET)
-        time.sleep(0.15)
+        # Hardware-Reset; setzt alle Register zurück, ein zusätzliches SWRESET ist nicht nötig
+        self.gpio.write(self.reset_pin, 0)
+        time.sleep(RESET_PULSE_TIME)
+        self.gpio.write(self.reset_pin, 1)
+        time.sleep(RESET_TIME)
+
         self.send_command(self.SLPOUT)
-        time.sleep(0.5)
+        time.sleep(SLEEP_OUT_TIME)
         self.send_command(self.COLMOD, [0x05])  # 16-Bit Farbmodus
         self.set_rotation(1)
-        self.send_command(self.DISPON)
-        time.sleep(0.1)
+        # DISPON folgt in flush() nach dem ersten, vollständigen Bild
+        self.display_on = False
+        self.has_last_frame = False
 
-    def update_display(self, screen):
-        # Hole die Pixel-Daten als NumPy-Array
-        arr = pygame.surfarray.array3d(screen)
-        # Transponiere, damit die Dimensionen (Höhe, Breite, 3) stimmen
-        arr = np.transpose(arr, (1, 0, 2))
-        r = arr[:, :, 0].astype(np.uint16)
-        g = arr[:, :, 1].astype(np.uint16)
-        b = arr[:, :, 2].astype(np.uint16)
-        color = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
-        high = (color >> 8) & 0xFF
-        low = color & 0xFF
-        rgb565 = np.dstack((high, low)).flatten().tolist()
-        self.set_window(0, 0, self.width - 1, self.height - 1)
-        lgpio.gpio_write(self.h, self.dc_pin, 1)
-        CHUNK_SIZE = 4096
-        for i in range(0, len(rgb565), CHUNK_SIZE):
-            self.spi.xfer2(rgb565[i:i+CHUNK_SIZE])
+    def flush(self, color):
+        """Sendet die geänderten Bereiche von color (== self.frame) an das Display."""
+        rects = self.get_dirty_rects(color)
+        area = sum((x1 - x0 + 1) * (y1 - y0 + 1) for x0, y0, x1, y1 in rects)
+
+        sent = 0
+        if not rects:
+            self.stats["skipped_frames"] += 1
+        elif area >= self.full_flush_ratio * self.width * self.height:
+            sent = self.send_rect(color, 0, 0, self.width - 1, self.height - 1)
+            self.stats["full_flushes"] += 1
+        else:
+            for x0, y0, x1, y1 in rects:
+                sent += self.send_rect(color, x0, y0, x1, y1)
+            self.stats["partial_flushes"] += 1
+
+        if not self.display_on:
+            self.send_command(self.DISPON)
+            self.display_on = True
+
+        # Puffer tauschen statt kopieren
+        self.frame, self.last_frame = self.last_frame, self.frame
+        self.has_last_frame = True
+        self.stats["frames"] += 1
+        self.stats["bytes_last_frame"] = sent
+        self.stats["bytes_total"] += sent
 
+    def send_rect(self, color, x0, y0, x1, y1):
+        """Sendet einen Ausschnitt des Bildes und gibt die Anzahl Pixel-Bytes zurück."""
+        rows = y1 - y0 + 1
+        cols = x1 - x0 + 1
+        if cols == self.width:
+            # Volle Zeilen liegen zusammenhängend im Speicher
+            block = color[y0:y1 + 1]
+        else:
+            block = self._scratch[:rows * cols].reshape(rows, cols)
+            np.copyto(block, color[y0:y1 + 1, x0:x1 + 1])
+        self.set_window(x0, y0, x1, y1)
+        self.gpio.write(self.dc_pin, 1)
+        # writebytes2 teilt große Puffer selbst in Blöcke auf
+        self.spi.writebytes2(memoryview(block).cast('B'))
+        return block.nbytes
@@ -0,0 +1,116 @@
+import multiprocessing
+import numpy as np
+import pygame
+from multiprocessing import shared_memory
+
+from palette import neutral_palette
+
+
+def _flush_worker(shm_name, width, height, indexed, display_factory, conn):
+    """Läuft im eigenen Prozess: wandelt fertige Frames um und schiebt sie per SPI raus."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    if indexed:
+        frames = np.ndarray((2, height, width), dtype=np.uint8, buffer=shm.buf)
+    else:
+        frames = np.ndarray((2, height, width, 4), dtype=np.uint8, buffer=shm.buf)
+    display_controller = display_factory()
+    try:
+        while True:
+            index = conn.recv()
+            if index is None:
+                break
+            if isinstance(index, tuple):
+                # ("palette", Farben) bzw. ("overlay", Pixel, Position): gilt ab dem nächsten Frame
+                getattr(display_controller, "set_" + index[0])(*index[1:])
+                continue
+            if indexed:
+                display_controller.update_indices(frames[index])
+            else:
+                display_controller.update_pixels(frames[index])
+            conn.send((index, display_controller.stats["bytes_last_frame"]))
+    finally:
+        del frames
+        shm.close()
+
+
+class FramePipeline:
+    """
+    Double Buffering über Shared Memory: Die UI zeichnet in einen Puffer,
+    während ein eigener Prozess den anderen umwandelt und an das Display sendet.
+    indexed: 8-Bit-Frames mit Paletten-Indizes (Palettenmodus), ein Viertel des Speichers.
+    """
+
+    def __init__(self, width, height, display_factory, indexed=False):
+        self.width = width
+        self.height = height
+        frame_size = width * height * (1 if indexed else 4)
+        self.shm = shared_memory.SharedMemory(create=True, size=2 * frame_size)
+        # Surfaces direkt auf dem Shared Memory - pygame zeichnet ohne Kopie hinein
+        self.surfaces = [
+            pygame.image.frombuffer(self.shm.buf[i * frame_size:(i + 1) * frame_size], (width, height), "P" if indexed else "RGBX")
+            for i in range(2)
+        ]
+        if indexed:
+            # Gleiche Palette wie die übrigen UI-Surfaces, sonst rechnet SDL beim Blitten um
+            for surface in self.surfaces:
+                surface.set_palette(neutral_palette())
+        self.back = 0
+        self.in_flight = set()
+        self.stats = {"frames": 0, "waits": 0, "bytes_last_frame": 0, "bytes_total": 0}
+
+        # fork statt spawn: spawn würde main.py im Kindprozess erneut ausführen
+        ctx = multiprocessing.get_context("fork")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_flush_worker,
+            args=(self.shm.name, width, height, indexed, display_factory, child_conn),
+            daemon=True,
+        )
+        self.process.start()
+
+    def get_surface(self):
+        """Die Surface, in die der nächste Frame gezeichnet werden soll."""
+        return self.surfaces[self.back]
+
+    def set_palette(self, colors):
+        """Neue Farben für den Palettenmodus an den Flush-Prozess geben."""
+        self.conn.send(("palette", list(colors)))
+
+    def set_overlay(self, pixels, position=(0, 0)):
+        """RGB565-Bild (Cover) für den Flush-Prozess; die paar KB gehen als Kopie durch die Pipe."""
+        self.conn.send(("overlay", None if pixels is None else np.array(pixels), position))
+
+    def _collect(self, block):
+        while self.in_flight and (block or self.conn.poll()):
+            index, sent = self.conn.recv()
+            self.in_flight.discard(index)
+            self.stats["bytes_last_frame"] = sent
+            self.stats["bytes_total"] += sent
+            block = False
+
+    def present(self):
+        """Übergibt den fertigen Frame an den Flush-Prozess und liefert die nächste Zeichenfläche."""
+        self._collect(block=False)
+        self.conn.send(self.back)
+        self.in_flight.add(self.back)
+        self.stats["frames"] += 1
+
+        self.back = 1 - self.back
+        # Erst weiterzeichnen, wenn der Worker diesen Puffer nicht mehr liest
+        if self.back in self.in_flight:
+            self.stats["waits"] += 1
+            while self.back in self.in_flight:
+                self._collect(block=True)
+        return self.surfaces[self.back]
+
+    def close(self):
+        if self.process.is_alive():
+            self.conn.send(None)
+            self.process.join(timeout=1.0)
+        self.surfaces = []
+        self.shm.unlink()
+        try:
+            self.shm.close()
+        except BufferError:
+            # Es gibt noch Surfaces auf dem Puffer - die Zuordnung verschwindet mit ihnen
+            pass
@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+# Eine Stufe pro Zeile; weitere Stufen werden bei Bedarf angelegt
+STAGES = [
+    "input", "update", "render",
+    "draw_generic_menu", "draw_all_songs_menu", "draw_list_menu", "draw_play_menu", "draw_scan_progress",
+    "rgb565", "spi", "present", "vlc",
+]
+
+_NULL_SECTION = nullcontext()
+
+
+class _Section:
+    __slots__ = ("profiler", "stage", "start")
+
+    def __init__(self, profiler, stage):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class FrameProfiler:
+    """
+    Misst die Dauer der heißen Stufen (Eingabe, Update, draw_*, RGB565, SPI,
+    VLC) in einem Ringpuffer fester Größe pro Stufe. Ist der Profiler
+    abgeschaltet, liefert section() einen leeren Kontext und instrument()
+    ändert nichts - die Stufen laufen dann ohne Zusatzkosten.
+    """
+
+    def __init__(self, enabled=False, capacity=256, metrics_path=None):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.metrics_path = metrics_path
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.positions = {}
+        self.counts = {}
+        for stage in STAGES:
+            self._add_stage(stage)
+
+    def _add_stage(self, stage):
+        self.samples[stage] = np.zeros(self.capacity)
+        self.positions[stage] = 0
+        self.counts[stage] = 0
+
+    def record(self, stage, seconds):
+        with self.lock:
+            if stage not in self.samples:
+                self._add_stage(stage)
+            position = self.positions[stage]
+            self.samples[stage][position] = seconds
+            self.positions[stage] = (position + 1) % self.capacity
+            self.counts[stage] += 1
+
+    def section(self, stage):
+        """with profiler.section("update"): ... misst den Block."""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, stage)
+
+    def wrap(self, stage, func):
+        """Gibt func mit Zeitmessung zurück (oder func selbst, wenn abgeschaltet)."""
+        if not self.enabled:
+            return func
+        record = self.record
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(stage, perf_counter() - start)
+
+        return timed
+
+    def instrument(self, obj, names, stage=None):
+        """
+        Ersetzt die Methoden names auf dem Objekt durch gemessene Varianten.
+        Ohne stage wird jede Methode unter ihrem eigenen Namen erfasst.
+        """
+        if not self.enabled:
+            return
+        for name in names:
+            setattr(obj, name, self.wrap(stage or name, getattr(obj, name)))
+
+    def percentiles(self, stage, quantiles=(50, 95, 99)):
+        """Perzentile in Millisekunden über die letzten capacity Messungen, None ohne Messungen."""
+        with self.lock:
+            count = min(self.counts.get(stage, 0), self.capacity)
+            if count == 0:
+                return None
+            values = self.samples[stage][:count].copy()
+        result = dict(zip(quantiles, np.percentile(values, quantiles) * 1000))
+        result["max"] = values.max() * 1000
+        result["count"] = self.counts[stage]
+        return result
+
+    def snapshot(self):
+        return {stage: p for stage in list(self.samples) if (p := self.percentiles(stage)) is not None}
+
+    def summary_lines(self):
+        """Kurze Zeilen für das Debug-Overlay: Stufe, p50 und p95 in ms."""
+        lines = []
+        for stage, p in self.snapshot().items():
+            name = stage[5:] if stage.startswith("draw_") else stage
+            lines.append(f"{name[:9]:9s} {p[50]:5.1f} {p[95]:5.1f}")
+        return lines
+
+    def write_metrics(self, path=None):
+        """Schreibt die Perzentile als JSON; über eine temporäre Datei, damit Leser nie halbe Dateien sehen."""
+        path = path or self.metrics_path
+        if path is None:
+            return
+        data = {
+            "time": time.time(),
+            "stages": {
+                stage: {"p50_ms": p[50], "p95_ms": p[95], "p99_ms": p[99], "max_ms": p["max"], "count": p["count"]}
+                for stage, p in self.snapshot().items()
+            },
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, path)
@@ -0,0 +1,74 @@
+import time
+
+
+class FrameScheduler:
+    """
+    Entscheidet, ob ein Frame gezeichnet werden muss. Gezeichnet wird nur,
+    wenn etwas als geändert markiert wurde oder ein Termin (Laufschrift,
+    Ablauf des Lautstärke-Overlays, ...) erreicht ist - höchstens mit max_fps,
+    im Leerlauf mit idle_fps als Lebenszeichen.
+    """
+
+    def __init__(self, max_fps=30, idle_fps=1, max_sleep=1.0):
+        if max_fps <= 0:
+            raise ValueError("max_fps muss größer als 0 sein")
+        self.min_frame_interval = 1.0 / max_fps
+        self.idle_interval = 1.0 / idle_fps if idle_fps else None
+        # Obergrenze nur für den Fall ohne Termin und ohne Leerlauf-Frame;
+        # Eingaben wecken den Render-Task selbst auf
+        self.max_sleep = max_sleep
+
+        self.dirty = True
+        self.next_deadline = None
+        self.last_render = 0.0
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def schedule(self, when):
+        """Spätestens zu diesem Zeitpunkt (time.time()) neu zeichnen."""
+        if self.next_deadline is None or when < self.next_deadline:
+            self.next_deadline = when
+
+    def _due(self, now):
+        if self.dirty:
+            return True
+        if self.next_deadline is not None and now >= self.next_deadline:
+            return True
+        return self.idle_interval is not None and now - self.last_render >= self.idle_interval
+
+    def should_render(self, now=None):
+        if now is None:
+            now = time.time()
+        if self._due(now) and now - self.last_render >= self.min_frame_interval:
+            return True
+        self.frames_skipped += 1
+        return False
+
+    def frame_rendered(self, now=None):
+        if now is None:
+            now = time.time()
+        self.last_render = now
+        self.dirty = False
+        if self.next_deadline is not None and self.next_deadline <= now:
+            self.next_deadline = None
+        self.frames_rendered += 1
+
+    def get_sleep_time(self, now=None):
+        """Zeit bis zum nächsten Frame, Termin oder Leerlauf-Frame, höchstens max_sleep."""
+        if now is None:
+            now = time.time()
+        wake = now + self.max_sleep
+        earliest_frame = self.last_render + self.min_frame_interval
+        if self.dirty:
+            wake = min(wake, earliest_frame)
+        if self.next_deadline is not None:
+            wake = min(wake, max(self.next_deadline, earliest_frame))
+        if self.idle_interval is not None:
+            wake = min(wake, self.last_render + self.idle_interval)
+        return max(0.0, wake - now)
+
+    def wait(self):
+        time.sleep(self.get_sleep_time())
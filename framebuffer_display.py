@@ -0,0 +1,85 @@
+import fcntl
+import mmap
+import os
+import numpy as np
+
+from display_controller import Rgb565Display
+
+DEFAULT_FRAMEBUFFER = "/dev/fb1"
+# ioctl aus linux/fb.h: Display einschalten, falls die Konsole es abgeschaltet hat
+FBIOBLANK = 0x4611
+FB_BLANK_UNBLANK = 0
+
+
+def _read_sysfs(device, name):
+    """Eigenschaft des Framebuffers aus /sys/class/graphics/fbN; None, wenn es sie nicht gibt."""
+    path = os.path.join("/sys/class/graphics", os.path.basename(device), name)
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class FramebufferDisplay(Rgb565Display):
+    """
+    Display über ein Framebuffer-Gerät (/dev/fbN), wie es fbtft oder ein
+    DRM-Treiber für kleine SPI-Displays bereitstellt. SPI, DMA und die
+    Panel-Befehle übernimmt der Kernel; hier werden nur die geänderten
+    Zeilen in den per mmap eingeblendeten Speicher kopiert.
+
+    Die Treiber übertragen per Deferred-IO nur die Speicherseiten, in die
+    geschrieben wurde. Deshalb wird nicht direkt in die Abbildung
+    umgewandelt (das würde jede Seite berühren), sondern in self.frame, und
+    nur geänderte Zeilen landen im Framebuffer. Die Abbildung dient dabei
+    zugleich als last_frame.
+    """
+
+    def __init__(self, width, height, device=DEFAULT_FRAMEBUFFER):
+        # Framebuffer-Pixel liegen in der Byte-Reihenfolge der CPU vor
+        super().__init__(width, height, np.uint16)
+
+        bits_per_pixel = _read_sysfs(device, "bits_per_pixel")
+        if bits_per_pixel is not None and int(bits_per_pixel) != 16:
+            raise ValueError(f"{device} hat {bits_per_pixel} Bit pro Pixel, unterstützt wird nur RGB565 (16 Bit)")
+        size = _read_sysfs(device, "virtual_size")
+        if size is not None:
+            fb_width, fb_height = (int(value) for value in size.split(","))
+            if fb_width < width or fb_height < height:
+                raise ValueError(f"{device} ist {fb_width}x{fb_height}, gebraucht wird {width}x{height} (rotate-Parameter des Treibers prüfen)")
+        stride = _read_sysfs(device, "stride")
+        self.stride = int(stride) if stride is not None else width * 2
+
+        self.device = device
+        self.fd = os.open(device, os.O_RDWR)
+        self.buffer = mmap.mmap(self.fd, self.stride * height)
+        self.last_frame = np.ndarray((height, self.stride // 2), dtype=np.uint16, buffer=self.buffer)[:, :width]
+        try:
+            fcntl.ioctl(self.fd, FBIOBLANK, FB_BLANK_UNBLANK)
+        except OSError:
+            pass  # z.B. Treiber ohne Blanking
+
+    def flush(self, color):
+        """Kopiert die geänderten Zeilen von color (== self.frame) in den Framebuffer."""
+        rects = self.get_dirty_rects(color)
+        written = 0
+        for x0, y0, x1, y1 in rects:
+            # Ganze Zeilen: die Treiber verfolgen Änderungen ohnehin pro Speicherseite
+            self.last_frame[y0:y1 + 1] = color[y0:y1 + 1]
+            written += (y1 - y0 + 1) * self.width * 2
+
+        if not rects:
+            self.stats["skipped_frames"] += 1
+        elif written == self.width * self.height * 2:
+            self.stats["full_flushes"] += 1
+        else:
+            self.stats["partial_flushes"] += 1
+        self.has_last_frame = True
+        self.stats["frames"] += 1
+        self.stats["bytes_last_frame"] = written
+        self.stats["bytes_total"] += written
+
+    def close(self):
+        self.last_frame = None
+        self.buffer.close()
+        os.close(self.fd)
@@ -0,0 +1,405 @@
+import os
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+INDEX_FILENAME = ".library.db"
+UNKNOWN = "Unbekannt"
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.flac')
+
+
+def _first_tag(tags, key):
+    try:
+        value = tags.get(key)
+    except Exception:
+        return None
+    if not value:
+        return None
+    return str(value[0]).strip() or None
+
+
+def read_track_info(path):
+    """Liest Dauer und Tags einer Datei. Gibt ein dict zurück, auch wenn mutagen fehlt."""
+    info = {"duration": None, "title": None, "artist": None, "album": None, "track_no": None}
+    # Erst hier importieren: mutagen wird nur im Scanner gebraucht, nicht beim Start
+    try:
+        import mutagen
+    except ImportError:
+        return info
+    try:
+        audio = mutagen.File(path, easy=True)
+    except Exception:
+        return info
+    if audio is None:
+        return info
+    if audio.info is not None:
+        info["duration"] = getattr(audio.info, "length", None)
+    if audio.tags is not None:
+        info["title"] = _first_tag(audio.tags, "title")
+        info["artist"] = _first_tag(audio.tags, "artist")
+        info["album"] = _first_tag(audio.tags, "album")
+        track = _first_tag(audio.tags, "tracknumber")
+        if track:
+            # Format ist oft "3/12"
+            try:
+                info["track_no"] = int(track.split("/")[0])
+            except ValueError:
+                pass
+    return info
+
+
+class LibraryIndex:
+    """
+    Persistenter Index der Musiksammlung (SQLite). Tags und Dauer werden nur
+    für Dateien neu gelesen, deren mtime oder Größe sich geändert hat.
+    """
+
+    def __init__(self, folder, db_path=None):
+        self.folder = folder
+        self.db_path = db_path or os.path.join(folder, INDEX_FILENAME)
+        # Die Verbindung wird auch aus dem VLC-Executor genutzt, Zugriffe laufen über self.lock
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.lock = threading.RLock()
+        # Zählt Änderungen über diese Verbindung (Watcher), damit abgeleitete Tabellen wissen, wann sie veraltet sind
+        self.changes = 0
+        # WAL: Der Scanner kann schreiben, während die UI liest
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS tracks (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                duration REAL,
+                title TEXT,
+                artist TEXT,
+                album TEXT,
+                track_no INTEGER
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tracks_artist ON tracks (artist COLLATE NOCASE)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tracks_album ON tracks (album COLLATE NOCASE)")
+        # Hüllkurven für die Waveform-Anzeige: Peaks und RMS als je eine Spalte uint8 pro Pixel
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS waveforms (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                envelope BLOB NOT NULL
+            )"""
+        )
+        # Integrierte Lautheit (LUFS) und Spitzenpegel; NULL, wenn der Titel nicht messbar war
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS loudness (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                loudness REAL,
+                peak REAL
+            )"""
+        )
+        # Schlüssel des Vorschaubilds in .covers, "" für Titel ohne Cover
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS covers (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                cover TEXT NOT NULL
+            )"""
+        )
+        self.conn.commit()
+
+    def known_files(self):
+        """dict Pfad -> (mtime, size) aller indizierten Dateien."""
+        return {path: (mtime, size) for path, mtime, size in self.conn.execute("SELECT path, mtime, size FROM tracks")}
+
+    def remove(self, paths):
+        params = [(path,) for path in paths]
+        self.conn.executemany("DELETE FROM tracks WHERE path = ?", params)
+        self.conn.executemany("DELETE FROM waveforms WHERE path = ?", params)
+        self.conn.executemany("DELETE FROM covers WHERE path = ?", params)
+        self.conn.executemany("DELETE FROM loudness WHERE path = ?", params)
+
+    def store(self, path, mtime, size, info):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO tracks (path, mtime, size, duration, title, artist, album, track_no) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, mtime, size, info["duration"], info["title"], info["artist"], info["album"], info["track_no"]),
+        )
+
+    def get_duration(self, path):
+        with self.lock:
+            row = self.conn.execute("SELECT duration FROM tracks WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def get_waveform(self, path):
+        """(peaks, rms) als bytes gleicher Länge; None, solange der Titel nicht analysiert ist, () wenn er sich nicht dekodieren ließ."""
+        with self.lock:
+            row = self.conn.execute("SELECT envelope FROM waveforms WHERE path = ?", (path,)).fetchone()
+        if not row:
+            return None
+        envelope = row[0]
+        if not envelope:
+            return ()
+        half = len(envelope) // 2
+        return envelope[:half], envelope[half:]
+
+    def store_waveform(self, path, mtime, peaks, rms):
+        """Leere peaks/rms markieren Dateien, die sich nicht dekodieren ließen."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO waveforms (path, mtime, envelope) VALUES (?, ?, ?)",
+            (path, mtime, bytes(peaks) + bytes(rms)),
+        )
+
+    def get_loudness(self, path):
+        """(loudness, peak) des Titels, None solange (oder falls) er nicht gemessen ist."""
+        with self.lock:
+            row = self.conn.execute("SELECT loudness, peak FROM loudness WHERE path = ?", (path,)).fetchone()
+        if not row or row[0] is None:
+            return None
+        return row
+
+    def store_loudness(self, path, mtime, loudness, peak):
+        """loudness None markiert Dateien, die sich nicht messen ließen (Stille, Dekodierfehler)."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO loudness (path, mtime, loudness, peak) VALUES (?, ?, ?, ?)",
+            (path, mtime, loudness, peak),
+        )
+
+    def has_analysis(self, path, mtime):
+        """True, wenn Hüllkurve und Lautheit zu dieser mtime vorliegen (auch als Fehlermarkierung)."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM waveforms w JOIN loudness l ON l.path = w.path "
+                "WHERE w.path = ? AND w.mtime = ? AND l.mtime = ?",
+                (path, mtime, mtime),
+            ).fetchone()
+        return row is not None
+
+    def missing_analysis(self, limit, suffix=None):
+        """Bis zu limit (Pfad, mtime) von Titeln ohne aktuelle Hüllkurve oder Lautheit."""
+        query = ("SELECT t.path, t.mtime FROM tracks t "
+                 "LEFT JOIN waveforms w ON w.path = t.path LEFT JOIN loudness l ON l.path = t.path "
+                 "WHERE (w.path IS NULL OR w.mtime != t.mtime OR l.path IS NULL OR l.mtime != t.mtime)")
+        params = []
+        if suffix is not None:
+            query += " AND t.path LIKE ?"
+            params.append("%" + suffix)
+        query += " LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            return self.conn.execute(query, params).fetchall()
+
+    def get_cover(self, path):
+        """Schlüssel des Vorschaubilds; None, solange der Titel nicht untersucht wurde, "" ohne Cover."""
+        with self.lock:
+            row = self.conn.execute("SELECT cover FROM covers WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def store_cover(self, path, mtime, cover):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO covers (path, mtime, cover) VALUES (?, ?, ?)",
+            (path, mtime, cover),
+        )
+
+    def cover_keys(self):
+        """Alle noch verwendeten Schlüssel von Vorschaubildern."""
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT DISTINCT cover FROM covers WHERE cover != ''")}
+
+    def missing_covers(self, limit):
+        """Bis zu limit (Pfad, mtime) von Titeln, deren Cover noch nicht (aktuell) extrahiert ist."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT t.path, t.mtime FROM tracks t LEFT JOIN covers c ON c.path = t.path "
+                "WHERE c.path IS NULL OR c.mtime != t.mtime LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def update_files(self, paths):
+        """Liest einzelne neue oder geänderte Dateien ein (für den Dateisystem-Watcher)."""
+        for path in paths:
+            full_path = os.path.join(self.folder, path)
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                continue
+            info = read_track_info(full_path)
+            with self.lock:
+                self.store(path, st.st_mtime, st.st_size, info)
+        with self.lock:
+            self.conn.commit()
+            self.changes += 1
+
+    def remove_files(self, paths):
+        with self.lock:
+            self.remove(paths)
+            self.conn.commit()
+            self.changes += 1
+
+    def close(self):
+        self.conn.close()
+
+
+def walk_audio_files(folder, subdir=""):
+    """
+    Liefert relative Pfade aller Audio-Dateien unterhalb von folder (rekursiv,
+    z.B. "Interpret/Album/01 Titel.mp3"). os.scandir liefert den Dateityp
+    gleich mit, dadurch entfällt ein stat() pro Eintrag. Versteckte Einträge
+    werden übersprungen, Verzeichnis-Symlinks nicht verfolgt.
+    """
+    stack = [subdir]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(folder, rel_dir)) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(rel_path)
+                elif entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                    yield rel_path
+            except OSError:
+                continue
+        # Rückwärts auf den Stack, damit die Verzeichnisse alphabetisch abgearbeitet werden
+        stack.extend(reversed(subdirs))
+
+
+class LibraryScanner:
+    """
+    Baut den Index im Hintergrund auf. Die Pfade kommen direkt aus dem
+    Verzeichnisdurchlauf in einen Worker-Pool (Prozesse oder Threads), die
+    Ergebnisse werden in Batches committet - schon gescannte Titel sind also
+    sofort im Index sichtbar.
+    """
+
+    def __init__(self, folder, db_path=None, workers=2, use_processes=True, batch_size=50, progress_callback=None):
+        self.folder = folder
+        self.db_path = db_path
+        self.workers = max(1, workers)
+        self.use_processes = use_processes
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+
+        # Fortschritt: gefundene Dateien, davon neu zu lesen, davon fertig
+        self.found = 0
+        self.pending = 0
+        self.done = 0
+        self.running = False
+        # Solange der Verzeichnisdurchlauf läuft, wächst pending noch - kein Anteil bekannt
+        self.walking = False
+        self.thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self.running = True
+        self.walking = True
+        self.thread = threading.Thread(target=self._run, name="library-scan", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.thread:
+            self.thread.join()
+
+    def get_progress(self):
+        """Anteil der fertig gelesenen Dateien (0.0 - 1.0), None solange noch Dateien gesucht werden."""
+        if self.walking:
+            return None
+        if self.pending == 0:
+            return 1.0 if not self.running else 0.0
+        return self.done / self.pending
+
+    def _make_pool(self):
+        if self.use_processes:
+            # fork: spawn würde main.py in jedem Worker erneut ausführen
+            return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("fork"))
+        return ThreadPoolExecutor(self.workers)
+
+    def _run(self):
+        # Eigene Verbindung, SQLite-Verbindungen gehören zu einem Thread
+        index = LibraryIndex(self.folder, self.db_path)
+        try:
+            known = index.known_files()
+            in_flight = {}
+            batch = 0
+            walk_complete = True
+            with self._make_pool() as pool:
+                for path in walk_audio_files(self.folder):
+                    if self._stop.is_set():
+                        walk_complete = False
+                        break
+                    self.found += 1
+                    full_path = os.path.join(self.folder, path)
+                    try:
+                        st = os.stat(full_path)
+                    except OSError:
+                        continue
+                    if known.pop(path, None) == (st.st_mtime, st.st_size):
+                        continue
+                    self.pending += 1
+                    future = pool.submit(read_track_info, full_path)
+                    in_flight[future] = (path, st.st_mtime, st.st_size)
+
+                    # Nicht beliebig viele Aufträge vorhalten
+                    if len(in_flight) >= self.workers * 4:
+                        batch += self._collect(index, in_flight)
+                    if batch >= self.batch_size:
+                        self._commit(index)
+                        batch = 0
+                        self._report()
+
+                # Ab hier steht fest, wie viele Dateien zu lesen sind
+                self.walking = False
+                while in_flight and not self._stop.is_set():
+                    batch += self._collect(index, in_flight)
+                    if batch >= self.batch_size:
+                        self._commit(index)
+                        batch = 0
+                        self._report()
+                if self._stop.is_set():
+                    walk_complete = False
+                    for future in in_flight:
+                        future.cancel()
+
+            # Gelöschte Dateien nur nach einem vollständigen Durchlauf entfernen
+            if walk_complete:
+                index.remove(known)
+            self._commit(index)
+        finally:
+            index.close()
+            self.walking = False
+            self.running = False
+            self._report()
+
+    def _collect(self, index, in_flight):
+        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in finished:
+            path, mtime, size = in_flight.pop(future)
+            try:
+                info = future.result()
+            except Exception:
+                continue
+            # Ein einzelner Fehler (gesperrte Datenbank, Datei weg) darf den Scan nicht beenden
+            try:
+                index.store(path, mtime, size, info)
+            except (sqlite3.OperationalError, OSError) as e:
+                print(f"Index-Eintrag für {path} fehlgeschlagen: {e}")
+            self.done += 1
+        return len(finished)
+
+    def _commit(self, index):
+        # Schlägt der Commit fehl (Datenbank gesperrt), bleiben die Zeilen offen und gehen mit dem nächsten mit
+        try:
+            index.conn.commit()
+        except sqlite3.OperationalError as e:
+            print(f"Bibliotheks-Index nicht gespeichert: {e}")
+
+    def _report(self):
+        if self.progress_callback:
+            self.progress_callback(self.done, self.pending, self.running)
@@ -0,0 +1,128 @@
+import os
+import queue
+import threading
+
+from library_index import AUDIO_EXTENSIONS, walk_audio_files
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+    flags = None
+
+# Ohne inotify wird der Ordner in diesem Abstand neu durchlaufen
+POLL_INTERVAL = 5.0
+# Events so lange sammeln, damit ein Kopiervorgang als eine Änderung ankommt (ms)
+SETTLE_DELAY_MS = 500
+
+
+class LibraryWatcher:
+    """
+    Beobachtet den Musikordner (rekursiv) und legt Änderungen als
+    (hinzugefügt, entfernt) - Listen relativer Pfade - in self.changes ab.
+    Umbenennen erscheint als Entfernen + Hinzufügen, geänderte Dateien als
+    erneutes Hinzufügen. Nutzt inotify (inotify_simple), sonst Polling.
+    """
+
+    def __init__(self, folder, use_inotify=True):
+        self.folder = folder
+        self.use_inotify = use_inotify and INotify is not None
+        self.changes = queue.Queue()
+        self.known = set()
+        self.thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        target = self._run_inotify if self.use_inotify else self._run_polling
+        self.thread = threading.Thread(target=target, name="library-watch", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.thread:
+            self.thread.join()
+
+    def _emit(self, added, removed):
+        if added or removed:
+            self.changes.put((sorted(added), sorted(removed)))
+
+    def _run_polling(self):
+        self.known = set(walk_audio_files(self.folder))
+        while not self._stop.wait(POLL_INTERVAL):
+            current = set(walk_audio_files(self.folder))
+            added = current - self.known
+            removed = self.known - current
+            self.known = current
+            self._emit(added, removed)
+
+    def _run_inotify(self):
+        mask = (flags.CLOSE_WRITE | flags.CREATE | flags.DELETE | flags.MOVED_FROM | flags.MOVED_TO
+                | flags.DELETE_SELF | flags.MOVE_SELF)
+        inotify = INotify()
+        watches = {}  # Watch-Deskriptor -> relatives Verzeichnis
+
+        def watch_tree(rel_dir):
+            # Verzeichnis und alle Unterverzeichnisse beobachten
+            stack = [rel_dir]
+            while stack:
+                current = stack.pop()
+                try:
+                    wd = inotify.add_watch(os.path.join(self.folder, current), mask)
+                except OSError:
+                    continue
+                watches[wd] = current
+                try:
+                    with os.scandir(os.path.join(self.folder, current)) as it:
+                        for entry in it:
+                            if not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False):
+                                stack.append(os.path.join(current, entry.name) if current else entry.name)
+                except OSError:
+                    pass
+
+        # Erst beobachten, dann auflisten - sonst gehen Änderungen dazwischen verloren
+        watch_tree("")
+        self.known = set(walk_audio_files(self.folder))
+        try:
+            while not self._stop.is_set():
+                events = inotify.read(timeout=1000, read_delay=SETTLE_DELAY_MS)
+                added = set()
+                removed = set()
+                for event in events:
+                    if event.mask & flags.IGNORED:
+                        watches.pop(event.wd, None)
+                        continue
+                    rel_dir = watches.get(event.wd)
+                    if rel_dir is None or not event.name or event.name.startswith("."):
+                        continue
+                    rel_path = os.path.join(rel_dir, event.name) if rel_dir else event.name
+
+                    if event.mask & flags.ISDIR:
+                        if event.mask & (flags.CREATE | flags.MOVED_TO):
+                            # Neuer oder hereinverschobener Ordner samt Inhalt
+                            watch_tree(rel_path)
+                            for path in walk_audio_files(self.folder, rel_path):
+                                removed.discard(path)
+                                added.add(path)
+                        elif event.mask & (flags.DELETE | flags.MOVED_FROM):
+                            prefix = rel_path + os.sep
+                            for path in [p for p in self.known | added if p.startswith(prefix)]:
+                                added.discard(path)
+                                removed.add(path)
+                        continue
+
+                    if not event.name.lower().endswith(AUDIO_EXTENSIONS):
+                        continue
+                    # CREATE allein reicht nicht: die Datei wird evtl. noch geschrieben
+                    if event.mask & (flags.CLOSE_WRITE | flags.MOVED_TO):
+                        removed.discard(rel_path)
+                        added.add(rel_path)
+                    elif event.mask & (flags.DELETE | flags.MOVED_FROM):
+                        added.discard(rel_path)
+                        removed.add(rel_path)
+
+                removed &= self.known
+                self.known -= removed
+                self.known |= added
+                self._emit(added, removed)
+        finally:
+            inotify.close()
@@ -0,0 +1,79 @@
+import bisect
+
+# Gruppen mit mehr Einträgen werden nach dem nächsten Buchstaben weiter aufgeteilt
+JUMP_GROUP_SIZE = 500
+JUMP_MAX_PREFIX = 3
+
+# Encoder-Beschleunigung: ab ACCEL_THRESHOLD Rasten/s wächst die Schrittweite,
+# bei voller Geschwindigkeit reichen ACCEL_FULL_LIST_DETENTS Rasten für die ganze Liste
+ACCEL_THRESHOLD = 8.0
+ACCEL_GAIN = 0.5
+ACCEL_FULL_LIST_DETENTS = 100
+
+
+def _group_key(text, length):
+    """Anfangsbuchstaben für die Sprungmarke; Ziffern und Sonderzeichen landen unter "#"."""
+    prefix = text[:length].upper()
+    if not prefix or not prefix[0].isalpha():
+        return "#"
+    return prefix
+
+
+class JumpIndex:
+    """
+    Sprungmarken einer Liste: Startposition jeder Gruppe von Einträgen mit
+    gleichem Anfangsbuchstaben. Zu große Gruppen werden nach zwei bzw. drei
+    Buchstaben unterteilt und benachbarte kleine Untergruppen wieder
+    zusammengelegt, sodass eine Gruppe höchstens etwa JUMP_GROUP_SIZE
+    Einträge hat. Bei sortierten Listen entspricht das einem Register A-Z.
+    """
+
+    def __init__(self, keys, group_size=JUMP_GROUP_SIZE):
+        self.starts = []
+        self.labels = []
+        self._split(keys, 0, len(keys), 1, group_size)
+        if not self.starts:
+            self.starts = [0]
+            self.labels = ["#"]
+
+    def _split(self, keys, begin, end, length, group_size):
+        position = begin
+        merged_start = None  # Untergruppen (length > 1) werden bis group_size zusammengelegt
+        while position < end:
+            label = _group_key(keys[position], length)
+            group_end = position + 1
+            while group_end < end and _group_key(keys[group_end], length) == label:
+                group_end += 1
+            if group_end - position > group_size and length < JUMP_MAX_PREFIX and label != "#":
+                merged_start = None
+                self._split(keys, position, group_end, length + 1, group_size)
+            elif length > 1 and merged_start is not None and group_end - merged_start <= group_size:
+                pass  # gehört noch zur vorherigen Marke
+            else:
+                merged_start = position
+                self.starts.append(position)
+                self.labels.append(label)
+            position = group_end
+
+    def group_of(self, position):
+        return max(0, bisect.bisect_right(self.starts, position) - 1)
+
+    def label_at(self, position):
+        return self.labels[self.group_of(position)]
+
+    def step(self, position, delta):
+        """Position nach delta Gruppen; rückwärts geht es zuerst an den Anfang der aktuellen Gruppe."""
+        group = self.group_of(position)
+        if delta < 0 and position > self.starts[group]:
+            delta += 1
+        return self.starts[(group + delta) % len(self.starts)]
+
+
+def accelerate(delta, speed, list_length):
+    """Schrittweite für eine Encoder-Bewegung abhängig von der Drehgeschwindigkeit (Rasten/s)."""
+    if speed <= ACCEL_THRESHOLD or delta == 0:
+        return delta
+    max_factor = max(1.0, list_length / ACCEL_FULL_LIST_DETENTS)
+    factor = min(max_factor, 1.0 + (speed - ACCEL_THRESHOLD) * ACCEL_GAIN)
+    step = int(round(delta * factor))
+    return step if step != 0 else delta
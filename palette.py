@@ -0,0 +1,111 @@
+"""
+Palettenmodus: Gezeichnet wird in 8-Bit-Surfaces, deren Pixel keine Farben,
+sondern Farbrollen sind (Hintergrund, Schrift, Markierung, ...). Die Farben
+eines Themes stehen nur in einer 256-Einträge-Palette, die der
+DisplayController als RGB565-Tabelle benutzt. Ein Theme-Wechsel tauscht
+damit nur die Tabelle, gecachte Texte und Flächen bleiben gültig.
+"""
+import numpy as np
+import pygame
+
+# Feste Indizes der Farbrollen, für alle Themes gleich
+PALETTE_ROLES = {
+    "bg": 0,
+    "fg": 1,
+    "highlight": 2,
+    "text_selected": 3,
+    "indicator": 4,
+    "track": 5,
+    "track_rms": 6,
+    "overlay_bg": 7,
+    "overlay_fg": 8,
+}
+# Farben, die in keinem Theme stehen (Debug-Overlay)
+FIXED_COLORS = {"overlay_bg": (0, 0, 0), "overlay_fg": (255, 255, 0)}
+
+# Kantenglättung: pro Schriftfarbe ein Verlauf von ihrem Hintergrund zur Schriftfarbe
+RAMP_BITS = 4
+RAMP_LEVELS = 1 << RAMP_BITS
+TEXT_RAMPS = {
+    PALETTE_ROLES["fg"]: (16, "bg"),
+    PALETTE_ROLES["text_selected"]: (32, "highlight"),
+}
+TRANSPARENT_INDEX = 255
+
+
+def build_palette(theme):
+    """Die 256 RGB-Farben eines Themes in der Anordnung von PALETTE_ROLES."""
+    colors = [(0, 0, 0)] * 256
+    for role, index in PALETTE_ROLES.items():
+        colors[index] = theme.get(role, FIXED_COLORS.get(role, (0, 0, 0)))
+    for index, (base, background) in TEXT_RAMPS.items():
+        start = np.array(theme[background], dtype=np.float32)
+        end = np.array(colors[index], dtype=np.float32)
+        for level in range(RAMP_LEVELS):
+            color = start + (end - start) * level / (RAMP_LEVELS - 1)
+            colors[base + level] = tuple(int(round(c)) for c in color)
+    return colors
+
+
+def create_surface(size):
+    # Alle 8-Bit-Surfaces behalten die Standardpalette von pygame. Bei gleichen
+    # Paletten kopiert SDL beim Blitten die Indizes unverändert, statt nach der
+    # nächsten Farbe zu suchen; die Farben selbst spielen keine Rolle.
+    return pygame.Surface(size, 0, 8)
+
+
+def neutral_palette():
+    """Die Standardpalette aus create_surface, für 8-Bit-Surfaces auf fremdem Speicher (frombuffer)."""
+    return pygame.Surface((1, 1), 0, 8).get_palette()
+
+
+def surface_like(screen, size):
+    """Hilfsfläche im Format der Zielfläche (8 Bit mit neutraler Palette oder RGB)."""
+    if screen.get_bytesize() == 1:
+        return create_surface(size)
+    return pygame.Surface(size)
+
+
+def render_text(font, text, index):
+    """
+    Text als 8-Bit-Surface mit Index-Pixeln. Hat die Farbe einen Verlauf, wird
+    die Kantenglättung auf RAMP_LEVELS Stufen abgebildet, sonst hart gezeichnet.
+    Nicht gesetzte Pixel sind über den Colorkey transparent (bei Verläufen
+    Stufe 0, die ohnehin der Hintergrundfarbe entspricht).
+    """
+    rendered = font.render(text, True, (255, 255, 255))
+    alpha = pygame.surfarray.pixels_alpha(rendered)
+    surface = create_surface(rendered.get_size())
+    view = surface.get_view('2')
+    # Direkt in die Pixel schreiben; nur billige uint8-Operationen, kein Gather
+    pixels = np.asarray(view)
+    ramp = TEXT_RAMPS.get(index)
+    if ramp is not None:
+        # Verläufe beginnen auf Vielfachen von RAMP_LEVELS: Stufe = obere Alpha-Bits
+        np.right_shift(alpha, 8 - RAMP_BITS, out=pixels)
+        pixels |= ramp[0]
+        colorkey = ramp[0]
+    else:
+        pixels[...] = index
+        pixels[alpha < 128] = TRANSPARENT_INDEX
+        colorkey = TRANSPARENT_INDEX
+    del pixels, view, alpha
+
+    surface.set_colorkey(colorkey)
+    return surface
+
+
+def fill(surface, index, rect=None):
+    """
+    Wie Surface.fill für 8-Bit-Surfaces. SDL füllt 1-Byte-Pixel Byte für Byte,
+    über die Pixel-Sicht mit numpy geht es um ein Vielfaches schneller.
+    Beachtet wie fill() den Clip-Bereich.
+    """
+    area = surface.get_clip()
+    if rect is not None:
+        area = area.clip(pygame.Rect(rect))
+    if area.width <= 0 or area.height <= 0:
+        return
+    view = surface.get_view('2')
+    np.asarray(view)[area.left:area.right, area.top:area.bottom] = index
+    del view
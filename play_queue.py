@@ -0,0 +1,210 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+REPEAT_MODES = ("all", "one", "off")
+STATE_FILENAME = ".player_state.json"
+# Position höchstens so oft schreiben; Zustandswechsel (Titel, Pause, ...) nach kurzer Sammelzeit
+STATE_FLUSH_INTERVAL = 30.0
+STATE_SETTLE_TIME = 2.0
+
+
+def shuffled_order(seed, count):
+    """Zufallsreihenfolge als reine Funktion von (seed, count) - gespeichert wird nur der Seed."""
+    order = list(range(count))
+    random.Random(seed).shuffle(order)
+    return order
+
+
+class PlayQueue:
+    """
+    Wiedergabereihenfolge als Indizes in audio_files: sortiert oder eine
+    feste Zufallspermutation (wird nicht pro Sprung neu gewürfelt), dazu
+    Wiederholen ("all", "one", "off") und eine "Als Nächstes"-Liste, die vor
+    der Reihenfolge abgespielt wird.
+    """
+
+    def __init__(self, count):
+        self.count = count
+        self.shuffle_seed = None
+        self.repeat = "all"
+        self.order = list(range(count))
+        self.position_of = None
+        self.position = 0
+        self.current = None
+        self.up_next = deque()
+
+    @property
+    def shuffle(self):
+        return self.shuffle_seed is not None
+
+    def _positions(self):
+        # Umkehrabbildung nur bei Bedarf neu aufbauen
+        if self.position_of is None:
+            self.position_of = {index: pos for pos, index in enumerate(self.order)}
+        return self.position_of
+
+    def set_current(self, index):
+        """Titel wurde direkt gewählt: die Reihenfolge läuft ab hier weiter."""
+        self.current = index
+        self.position = self._positions().get(index, self.position)
+
+    def peek_next(self, auto=True):
+        """Nächster Titel ohne weiterzuschalten. auto: Titel ist zu Ende gelaufen (nicht übersprungen)."""
+        if auto and self.repeat == "one" and self.current is not None:
+            return self.current
+        if self.up_next:
+            return self.up_next[0]
+        if not self.order:
+            return None
+        if self.position + 1 < len(self.order):
+            return self.order[self.position + 1]
+        if auto and self.repeat == "off":
+            return None
+        return self.order[0]
+
+    def advance_to(self, index):
+        """Übernimmt den Titel, den peek_next() geliefert hat."""
+        if self.up_next and self.up_next[0] == index:
+            self.up_next.popleft()
+            self.current = index
+        elif index != self.current:
+            self.set_current(index)
+
+    def next(self, auto=False):
+        index = self.peek_next(auto)
+        if index is not None:
+            self.advance_to(index)
+        return index
+
+    def previous(self):
+        if not self.order:
+            return None
+        self.position = (self.position - 1) % len(self.order)
+        self.current = self.order[self.position]
+        return self.current
+
+    def enqueue(self, index):
+        self.up_next.append(index)
+
+    def set_shuffle(self, enabled, seed=None):
+        if enabled:
+            self.shuffle_seed = seed if seed is not None else random.getrandbits(32)
+            self.order = shuffled_order(self.shuffle_seed, self.count)
+        else:
+            self.shuffle_seed = None
+            self.order = list(range(self.count))
+        self.position_of = None
+        if self.current is not None:
+            self.set_current(self.current)
+
+    def cycle_repeat(self):
+        self.repeat = REPEAT_MODES[(REPEAT_MODES.index(self.repeat) + 1) % len(REPEAT_MODES)]
+        return self.repeat
+
+    def remap(self, remap, count):
+        """Nach Änderungen der Bibliothek: alte Indizes umrechnen, Reihenfolge neu aufbauen."""
+        self.count = count
+        if self.shuffle:
+            # Wieder aus (seed, count) erzeugen, damit ein Neustart mit dem
+            # gespeicherten Seed genau diese Reihenfolge vorfindet
+            self.order = shuffled_order(self.shuffle_seed, count)
+        else:
+            self.order = list(range(count))
+        self.position_of = None
+        self.up_next = deque(index for index in map(remap, self.up_next) if index is not None)
+        if self.current is not None:
+            current = remap(self.current)
+            if current is not None:
+                self.set_current(current)
+            else:
+                self.current = None
+                self.position = min(self.position, max(0, len(self.order) - 1))
+
+
+class StateJournal:
+    """
+    Speichert den Wiedergabezustand gebündelt: update() merkt sich nur den
+    neuesten Stand, ein Hintergrund-Thread schreibt ihn spätestens nach
+    STATE_FLUSH_INTERVAL (bzw. STATE_SETTLE_TIME bei wichtigen Änderungen).
+    So gibt es keine synchronen Schreibzugriffe im UI-Pfad und wenig
+    Schreiblast auf der SD-Karte. Geschrieben wird atomar per rename.
+    """
+
+    def __init__(self, path, flush_interval=STATE_FLUSH_INTERVAL, settle_time=STATE_SETTLE_TIME):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.settle_time = settle_time
+        self.pending = None
+        self.written = None
+        self.deadline = None
+        self.writes = 0
+        self.condition = threading.Condition()
+        self.running = path is not None
+        self.thread = None
+        if self.running:
+            self.thread = threading.Thread(target=self._run, name="state-journal", daemon=True)
+            self.thread.start()
+
+    def load(self):
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        self.written = state
+        return state if isinstance(state, dict) else {}
+
+    def update(self, state, urgent=False):
+        if not self.running:
+            return
+        with self.condition:
+            self.pending = state
+            deadline = time.monotonic() + (self.settle_time if urgent else self.flush_interval)
+            if self.deadline is None or deadline < self.deadline:
+                self.deadline = deadline
+                self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.running and (self.deadline is None or self.deadline > time.monotonic()):
+                    timeout = None if self.deadline is None else self.deadline - time.monotonic()
+                    self.condition.wait(timeout)
+                if not self.running:
+                    return
+                state, self.pending, self.deadline = self.pending, None, None
+            # Schreiben ohne Lock, damit update() nie auf fsync wartet
+            self._write(state)
+
+    def _write(self, state):
+        if state is None or state == self.written:
+            return
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Zustand konnte nicht gespeichert werden: {e}")
+            return
+        self.written = state
+        self.writes += 1
+
+    def close(self):
+        """Letzten Stand sofort schreiben und den Thread beenden."""
+        if not self.running:
+            return
+        with self.condition:
+            self.running = False
+            state, self.pending, self.deadline = self.pending, None, None
+            self.condition.notify()
+        self.thread.join()
+        self._write(state)
@@ -1,42 +1,184 @@
-import board
-from adafruit_seesaw import seesaw, rotaryio, digitalio
+import threading
+import time
+
+# Pin-Belegung der ANO-Drehencoder-Platine
+BUTTON_PINS = {"select": 1, "up": 2, "left": 3, "down": 4, "right": 5}
+
+DEBOUNCE_TIME = 0.03
+LONG_PRESS_TIME = 0.6
+# Tasten mit eigener Bedeutung für langes Drücken (Debug-Overlay, Sprungmodus):
+# Bei ihnen kommt "press" erst beim Loslassen, und nur ohne vorheriges "long_press"
+LONG_PRESS_BUTTONS = ("left", "right")
+# Nach dieser Pause ohne Drehung gilt der Encoder wieder als langsam
+ENCODER_IDLE_TIME = 0.25
+
+
+class ButtonState:
+    """
+    Entprellung per Zeitstempel: Flanken innerhalb von DEBOUNCE_TIME werden
+    ignoriert. deferred: "press" erst beim Loslassen melden, damit ein langes
+    Drücken nicht zusätzlich die kurze Aktion auslöst.
+    """
+
+    def __init__(self, name, deferred=False):
+        self.name = name
+        self.deferred = deferred
+        self.pressed = False
+        self.changed_at = 0.0
+        self.long_press_sent = False
+
+    def update(self, raw_pressed, now, events):
+        if raw_pressed != self.pressed and now - self.changed_at >= DEBOUNCE_TIME:
+            self.pressed = raw_pressed
+            self.changed_at = now
+            if raw_pressed:
+                self.long_press_sent = False
+                if not self.deferred:
+                    events.append((self.name, "press"))
+            else:
+                if self.deferred and not self.long_press_sent:
+                    events.append((self.name, "press"))
+                events.append((self.name, "release"))
+        elif self.pressed and not self.long_press_sent and now - self.changed_at >= LONG_PRESS_TIME:
+            self.long_press_sent = True
+            events.append((self.name, "long_press"))
+
 
 class SeesawInput:
-    def __init__(self, addr=0x49):
-        self.i2c = board.I2C()
-        self.device = seesaw.Seesaw(self.i2c, addr=addr)
+    def __init__(self, addr=0x49, int_pin=None, device=None, encoder=None, long_press_buttons=LONG_PRESS_BUTTONS):
+        """
+        device/encoder sind austauschbar (z.B. sim_backends.ScriptedSeesaw),
+        ohne Angabe wird der Seesaw über board.I2C() angesprochen.
+        """
+        if device is None:
+            import board
+            from adafruit_seesaw import seesaw
+            self.i2c = board.I2C()
+            device = seesaw.Seesaw(self.i2c, addr=addr)
+        self.device = device
         product = (self.device.get_version() >> 16) & 0xFFFF
         print(f"Found product {product}")
         if product != 5740:
             print("Wrong firmware loaded? Expected 5740")
-        for pin in range(1, 6):
-            self.device.pin_mode(pin, self.device.INPUT_PULLUP)
-        self.select = digitalio.DigitalIO(self.device, 1)
-        self.up = digitalio.DigitalIO(self.device, 2)
-        self.left = digitalio.DigitalIO(self.device, 3)
-        self.down = digitalio.DigitalIO(self.device, 4)
-        self.right = digitalio.DigitalIO(self.device, 5)
-        self.encoder = rotaryio.IncrementalEncoder(self.device)
+
+        self.button_mask = 0
+        for pin in BUTTON_PINS.values():
+            self.button_mask |= 1 << pin
+        self.device.pin_mode_bulk(self.button_mask, self.device.INPUT_PULLUP)
+        self.buttons = {name: ButtonState(name, name in long_press_buttons) for name in BUTTON_PINS}
+        self.last_button_bits = self.button_mask  # Pull-Up: 1 = nicht gedrückt
+
+        if encoder is None:
+            from adafruit_seesaw import rotaryio
+            encoder = rotaryio.IncrementalEncoder(self.device)
+        self.encoder = encoder
         self.last_encoder_position = self.encoder.position
+        self.pending_delta = 0
+        # Drehgeschwindigkeit in Rasten pro Sekunde (geglättet) für die Beschleunigung
+        self.encoder_speed = 0.0
+        self.last_encoder_time = None
+
+        # Optional: INT-Leitung des Seesaw, damit im Leerlauf kein I2C-Verkehr entsteht
+        self.int_pin = int_pin
+        self.gpio = None
+        if int_pin is not None:
+            import lgpio
+            self.lgpio = lgpio
+            self.gpio = lgpio.gpiochip_open(0)
+            # Fallende Flanke melden lassen, damit im Leerlauf blockierend gewartet werden kann
+            self.edge = threading.Event()
+            lgpio.gpio_claim_alert(self.gpio, int_pin, lgpio.FALLING_EDGE, lgpio.SET_PULL_UP)
+            self.edge_callback = lgpio.callback(self.gpio, int_pin, lgpio.FALLING_EDGE, self._on_edge)
+            self.device.set_GPIO_interrupts(self.button_mask, True)
+            self.device.enable_encoder_interrupt()
+            self.device.get_GPIO_interrupt_flag()
+
+    def _on_edge(self, chip, gpio, level, tick):
+        self.edge.set()
+
+    def _interrupt_pending(self):
+        # INT ist low-aktiv
+        return self.lgpio.gpio_read(self.gpio, self.int_pin) == 0
+
+    @property
+    def has_interrupt(self):
+        return self.gpio is not None
+
+    def wait_for_interrupt(self, timeout):
+        """
+        Blockiert bis zur nächsten Flanke der INT-Leitung, höchstens timeout
+        Sekunden - ohne I2C-Verkehr. Gibt True zurück, wenn eine Eingabe anliegt.
+        """
+        if self._interrupt_pending():
+            return True
+        pending = self.edge.wait(timeout)
+        self.edge.clear()
+        return pending
+
+    def is_active(self, now=None):
+        """Taste gedrückt oder Flanke noch in der Entprellzeit - dann weiter schnell abfragen."""
+        if now is None:
+            now = time.monotonic()
+        return any(button.pressed or now - button.changed_at < DEBOUNCE_TIME for button in self.buttons.values())
+
+    def poll(self, now=None):
+        """
+        Liest alle Tasten mit einem einzigen Bulk-Zugriff und den Encoder.
+        Gibt eine Liste von (taste, ereignis) zurück, ereignis ist
+        "press", "release" oder "long_press". Blockiert nie.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        if self.gpio is None or self._interrupt_pending():
+            self.last_button_bits = self.device.digital_read_bulk(self.button_mask)
+            current = self.encoder.position
+            moved = current - self.last_encoder_position
+            if moved:
+                self._update_speed(abs(moved), now)
+            self.pending_delta += moved
+            self.last_encoder_position = current
+            if self.gpio is not None:
+                # Lesen der Flags setzt die INT-Leitung zurück
+                self.device.get_GPIO_interrupt_flag()
+
+        events = []
+        for name, pin in BUTTON_PINS.items():
+            self.buttons[name].update(not self.last_button_bits & (1 << pin), now, events)
+        return events
+
+    def _update_speed(self, detents, now):
+        if self.last_encoder_time is None or now - self.last_encoder_time > ENCODER_IDLE_TIME:
+            self.encoder_speed = 0.0
+        else:
+            instant = detents / max(now - self.last_encoder_time, 0.001)
+            self.encoder_speed = 0.5 * self.encoder_speed + 0.5 * instant
+        self.last_encoder_time = now
+
+    def get_encoder_speed(self, now=None):
+        """Geglättete Drehgeschwindigkeit in Rasten/s, 0 nach einer Pause."""
+        if now is None:
+            now = time.monotonic()
+        if self.last_encoder_time is None or now - self.last_encoder_time > ENCODER_IDLE_TIME:
+            return 0.0
+        return self.encoder_speed
 
     def get_encoder_delta(self):
-        current = self.encoder.position
-        delta = current - self.last_encoder_position
-        self.last_encoder_position = current
+        delta = self.pending_delta
+        self.pending_delta = 0
         return delta
 
     def is_select_pressed(self):
-        return not self.select.value
+        return self.buttons["select"].pressed
 
     def is_left_pressed(self):
-        return not self.left.value
+        return self.buttons["left"].pressed
 
     def is_right_pressed(self):
-        return not self.right.value
+        return self.buttons["right"].pressed
 
     def is_up_pressed(self):
-        return not self.up.value
+        return self.buttons["up"].pressed
 
     def is_down_pressed(self):
-        return not self.down.value
-
+        return self.buttons["down"].pressed
@@ -0,0 +1,323 @@
+"""
+In-Process-Attrappen für ST7735 (SPI/GPIO), Seesaw und VLC. Damit laufen
+UserInterface, MenuStateMachine, DisplayController und AudioPlayer ohne Pi,
+z.B. für benchmark.py.
+"""
+import time
+from types import SimpleNamespace
+
+
+class FakeClock:
+    """Manuell weitergestellte Uhr, damit Benchmarks reproduzierbar sind."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+# --- Display ---
+
+class FakeSpiBus:
+    """Zählt Bytes und Transfers; bus_time ist die rechnerische Übertragungszeit beim eingestellten Takt."""
+
+    def __init__(self, simulate_transfer_time=False):
+        self.max_speed_hz = 0
+        self.mode = 0
+        self.simulate_transfer_time = simulate_transfer_time
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.bytes_sent = 0
+        self.transfers = 0
+        self.bus_time = 0.0
+
+    def _record(self, nbytes):
+        self.bytes_sent += nbytes
+        self.transfers += 1
+        if self.max_speed_hz:
+            seconds = nbytes * 8 / self.max_speed_hz
+            self.bus_time += seconds
+            if self.simulate_transfer_time:
+                time.sleep(seconds)
+
+    def xfer(self, data):
+        self._record(len(data))
+
+    def xfer2(self, data):
+        self._record(len(data))
+
+    def writebytes2(self, data):
+        self._record(memoryview(data).nbytes)
+
+
+class FakeGpio:
+    def __init__(self):
+        self.levels = {}
+        self.writes = 0
+
+    def claim_output(self, pin):
+        self.levels[pin] = 0
+
+    def write(self, pin, value):
+        self.levels[pin] = value
+        self.writes += 1
+
+
+# --- Eingabe ---
+
+class ScriptedSeesaw:
+    """
+    Spielt eine Eingabe-Aufzeichnung ab: Liste von (zeit, taste, gedrückt)
+    für Tasten bzw. (zeit, "encoder", schritte) für Drehungen. Dient zugleich
+    als Encoder (Attribut position).
+    """
+
+    INPUT_PULLUP = 2
+    PINS = {"select": 1, "up": 2, "left": 3, "down": 4, "right": 5}
+
+    def __init__(self, trace, clock=time.monotonic):
+        self.trace = sorted(trace, key=lambda entry: entry[0])
+        self.clock = clock
+        self.next_entry = 0
+        self.pressed = set()
+        self._position = 0
+        self.reads = 0
+
+    def _replay(self):
+        now = self.clock()
+        while self.next_entry < len(self.trace) and self.trace[self.next_entry][0] <= now:
+            _, name, value = self.trace[self.next_entry]
+            if name == "encoder":
+                self._position += value
+            elif value:
+                self.pressed.add(name)
+            else:
+                self.pressed.discard(name)
+            self.next_entry += 1
+
+    def get_version(self):
+        return 5740 << 16
+
+    def pin_mode_bulk(self, pins, mode):
+        pass
+
+    def digital_read_bulk(self, pins, delay=0.008):
+        self._replay()
+        self.reads += 1
+        bits = pins
+        for name in self.pressed:
+            bits &= ~(1 << self.PINS[name])
+        return bits
+
+    @property
+    def position(self):
+        self._replay()
+        return self._position
+
+
+# --- VLC ---
+
+class FakeEvent:
+    def __init__(self, **values):
+        self.u = SimpleNamespace(**values)
+
+
+class FakeEventManager:
+    def __init__(self):
+        self.callbacks = {}
+
+    def event_attach(self, event_type, callback, *args):
+        self.callbacks.setdefault(event_type, []).append((callback, args))
+
+    def emit(self, event_type, **values):
+        for callback, args in self.callbacks.get(event_type, []):
+            callback(FakeEvent(**values), *args)
+
+
+class FakeMedia:
+    def __init__(self, path):
+        self.path = path
+        self.options = []
+
+    def add_option(self, option):
+        self.options.append(option)
+
+    def parse_with_options(self, flags, timeout):
+        pass
+
+    def get_mrl(self):
+        return "file://" + self.path
+
+
+class FakeMediaList:
+    def __init__(self):
+        self.items = []
+
+    def add_media(self, media):
+        self.items.append(media)
+
+    def count(self):
+        return len(self.items)
+
+    def remove_index(self, index):
+        if not 0 <= index < len(self.items):
+            return -1
+        del self.items[index]
+        return 0
+
+    def lock(self):
+        pass
+
+    def unlock(self):
+        pass
+
+
+class FakeMediaPlayer:
+    """Spielt anhand der Uhr; update() erzeugt TimeChanged-/EndReached-Events."""
+
+    def __init__(self, vlc):
+        self.vlc = vlc
+        self.events = FakeEventManager()
+        self.media = None
+        self.started_at = None
+        self.paused_at = None
+        self.volume = 100
+        self.ended = False
+
+    def event_manager(self):
+        return self.events
+
+    def set_media(self, media):
+        self.media = media
+
+    def get_media(self):
+        return self.media
+
+    def play(self):
+        self.started_at = self.vlc.clock()
+        self.paused_at = None
+        self.ended = False
+
+    def pause(self):
+        if self.paused_at is None:
+            self.paused_at = self.vlc.clock()
+        else:
+            self.started_at += self.vlc.clock() - self.paused_at
+            self.paused_at = None
+
+    def get_time(self):
+        if self.started_at is None:
+            return 0
+        now = self.paused_at if self.paused_at is not None else self.vlc.clock()
+        return int((now - self.started_at) * 1000)
+
+    def set_time(self, ms):
+        pass
+
+    def get_state(self):
+        return self.vlc.State.Ended if self.ended else self.vlc.State.Playing
+
+    def audio_set_volume(self, volume):
+        self.volume = volume
+
+    def update(self):
+        if self.started_at is None or self.ended or self.paused_at is not None:
+            return False
+        ms = self.get_time()
+        self.events.emit(self.vlc.EventType.MediaPlayerTimeChanged, new_time=ms)
+        if ms >= self.vlc.track_length * 1000:
+            self.ended = True
+            self.events.emit(self.vlc.EventType.MediaPlayerEndReached)
+            return True
+        return False
+
+
+class FakeMediaListPlayer:
+    def __init__(self, vlc):
+        self.vlc = vlc
+        self.events = FakeEventManager()
+        self.player = None
+        self.media_list = None
+        self.index = 0
+
+    def event_manager(self):
+        return self.events
+
+    def set_media_player(self, player):
+        self.player = player
+
+    def set_media_list(self, media_list):
+        self.media_list = media_list
+
+    def play_item_at_index(self, index):
+        self.index = index
+        self.player.set_media(self.media_list.items[index])
+        self.player.play()
+        self.events.emit(self.vlc.EventType.MediaListPlayerNextItemSet)
+
+    def stop(self):
+        self.player.started_at = None
+
+    def update(self):
+        # Nach dem Ende eines Titels wie VLC zum nächsten Eintrag der Liste wechseln
+        if self.player.update() and self.media_list and self.index + 1 < len(self.media_list.items):
+            self.play_item_at_index(self.index + 1)
+
+
+class FakeVlcInstance:
+    def __init__(self, vlc):
+        self.vlc = vlc
+
+    def media_player_new(self):
+        player = FakeMediaPlayer(self.vlc)
+        self.vlc.players.append(player)
+        return player
+
+    def media_list_player_new(self):
+        list_player = FakeMediaListPlayer(self.vlc)
+        self.vlc.list_players.append(list_player)
+        return list_player
+
+    def media_new(self, path):
+        return FakeMedia(path)
+
+    def media_list_new(self):
+        return FakeMediaList()
+
+
+class FakeVlc:
+    """Ersatz für das vlc-Modul (AudioPlayer(..., vlc_module=FakeVlc(clock)))."""
+
+    class State:
+        Playing = 3
+        Paused = 4
+        Ended = 6
+
+    class EventType:
+        MediaPlayerEndReached = 265
+        MediaPlayerTimeChanged = 267
+        MediaPlayerLengthChanged = 273
+        MediaPlayerEncounteredError = 266
+        MediaListPlayerNextItemSet = 1025
+
+    class MediaParseFlag:
+        local = 0
+
+    def __init__(self, clock=time.monotonic, track_length=180.0):
+        self.clock = clock
+        self.track_length = track_length
+        self.players = []
+        self.list_players = []
+
+    def Instance(self, *args):
+        return FakeVlcInstance(self)
+
+    def update(self):
+        """Simuliert den VLC-Thread: Events für den aktuellen Zeitpunkt auslösen."""
+        for list_player in self.list_players:
+            list_player.update()
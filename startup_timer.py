@@ -0,0 +1,45 @@
+import os
+import time
+
+
+def process_age():
+    """Sekunden seit Prozessstart (inkl. Start des Interpreters), 0.0 wenn /proc fehlt."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Feld 22 (starttime) in Ticks seit Boot; der Name in Klammern kann Leerzeichen enthalten
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupTimer:
+    """
+    Zeitpunkte der Startphasen (Imports, Display, erster Frame, ...) relativ
+    zum Prozessstart. report() gibt die Phasen aus und warnt, wenn der erste
+    Frame das Budget überschreitet.
+    """
+
+    def __init__(self, first_frame_budget=1.5):
+        self.first_frame_budget = first_frame_budget
+        self.t0 = time.perf_counter() - process_age()
+        self.phases = []
+        self.first_frame = None
+
+    def mark(self, phase):
+        self.phases.append((phase, time.perf_counter() - self.t0))
+
+    def mark_first_frame(self):
+        self.mark("erster Frame")
+        self.first_frame = self.phases[-1][1]
+
+    def report(self):
+        previous = 0.0
+        print("Startphasen:")
+        for phase, at in self.phases:
+            print(f"  {at * 1000:7.1f} ms  (+{(at - previous) * 1000:6.1f} ms)  {phase}")
+            previous = at
+        if self.first_frame is not None and self.first_frame > self.first_frame_budget:
+            print(f"WARNUNG: erster Frame nach {self.first_frame:.2f} s, Budget {self.first_frame_budget:.2f} s")
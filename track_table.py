@@ -0,0 +1,105 @@
+import bisect
+import numpy as np
+
+from library_index import UNKNOWN
+
+
+def _sort_key(text):
+    # Wie COLLATE NOCASE im Index, bei Gleichstand entscheidet die Schreibweise
+    return (text.casefold(), text)
+
+
+class StringPool:
+    """
+    Jeder Interpret bzw. jedes Album genau einmal, sortiert ohne Groß- und
+    Kleinschreibung. Die ID eines Strings ist zugleich seine Position in
+    der sortierten Liste; Suchen gehen per Bisektion ohne eigenes dict.
+    """
+
+    def __init__(self, values):
+        self.strings = sorted(set(values), key=_sort_key)
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+    def id_of(self, text):
+        """ID des Strings oder -1, wenn es ihn nicht gibt (O(log n))."""
+        position = bisect.bisect_left(self.strings, _sort_key(text), key=_sort_key)
+        if position < len(self.strings) and self.strings[position] == text:
+            return position
+        return -1
+
+
+class TrackTable:
+    """
+    Spaltenweise Sicht auf die Bibliothek für die Menüs "Interpret" und
+    "Album": pro Titel nur IDs in numpy-Arrays statt eines Objekts mit
+    eigenen Strings. Dazu vorberechnete Sortier-Permutationen (Interpret ->
+    Album -> Track bzw. Album -> Track) mit Startpositionen je ID, sodass die
+    Titel eines Interpreten oder Albums ein einfacher Ausschnitt sind.
+    Zeilen entsprechen den Indizes in AudioPlayer.audio_files.
+    """
+
+    def __init__(self, count, rows):
+        """rows: (Index, Interpret, Album, Tracknummer) für alle Titel im Index, None = ohne Tag."""
+        artist_names = [None] * count
+        album_names = [None] * count
+        self.track_no = np.zeros(count, dtype=np.int32)
+        for index, artist, album, track_no in rows:
+            artist_names[index] = artist or UNKNOWN
+            album_names[index] = album or UNKNOWN
+            # Ohne Tracknummer vorne einsortieren, wie NULL in SQLite
+            self.track_no[index] = -1 if track_no is None else track_no
+
+        self.artists = StringPool(name for name in artist_names if name is not None)
+        self.albums = StringPool(name for name in album_names if name is not None)
+        # Nur während des Aufbaus: String -> ID. Noch nicht gescannte Titel
+        # bekommen die ID len(pool), landen damit hinter allen Startpositionen
+        # und tauchen wie bisher in keinem Menü auf.
+        artist_ids = {name: i for i, name in enumerate(self.artists.strings)}
+        album_ids = {name: i for i, name in enumerate(self.albums.strings)}
+        missing_artist = len(self.artists)
+        missing_album = len(self.albums)
+        self.artist = np.fromiter((artist_ids.get(name, missing_artist) for name in artist_names), dtype=np.int32, count=count)
+        self.album = np.fromiter((album_ids.get(name, missing_album) for name in album_names), dtype=np.int32, count=count)
+        del artist_names, album_names, artist_ids, album_ids
+
+        # lexsort sortiert nach dem letzten Schlüssel zuerst; der Index macht die Reihenfolge stabil
+        order = np.arange(count, dtype=np.int32)
+        self.by_artist = np.lexsort((order, self.track_no, self.album, self.artist)).astype(np.int32)
+        self.by_album = np.lexsort((order, self.track_no, self.album)).astype(np.int32)
+        self.artist_starts = np.searchsorted(self.artist[self.by_artist], np.arange(len(self.artists) + 1))
+        self.album_starts = np.searchsorted(self.album[self.by_album], np.arange(len(self.albums) + 1))
+
+    @classmethod
+    def from_index(cls, library, file_index):
+        """Baut die Tabelle aus dem Bibliotheks-Index; file_index bildet Pfade auf Indizes ab."""
+        with library.lock:
+            cursor = library.conn.execute("SELECT path, artist, album, track_no FROM tracks")
+            rows = (
+                (file_index[path], artist, album, track_no)
+                for path, artist, album, track_no in cursor
+                if path in file_index
+            )
+            return cls(len(file_index), rows)
+
+    def tracks_of_artist(self, name):
+        """Indizes der Titel eines Interpreten, sortiert nach Album und Tracknummer."""
+        artist_id = self.artists.id_of(name)
+        if artist_id < 0:
+            return []
+        return self.by_artist[self.artist_starts[artist_id]:self.artist_starts[artist_id + 1]].tolist()
+
+    def tracks_of_album(self, name):
+        album_id = self.albums.id_of(name)
+        if album_id < 0:
+            return []
+        return self.by_album[self.album_starts[album_id]:self.album_starts[album_id + 1]].tolist()
+
+    def nbytes(self):
+        """Speicher der Spalten und Permutationen (ohne die Strings der Pools)."""
+        arrays = (self.track_no, self.artist, self.album, self.by_artist, self.by_album, self.artist_starts, self.album_starts)
+        return sum(array.nbytes for array in arrays)
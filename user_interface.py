@@ -1,27 +1,203 @@
 import pygame
-import os
 import time
+import weakref
+from collections import OrderedDict
+
+from palette import PALETTE_ROLES, build_palette, create_surface, surface_like, render_text
+from palette import fill as fill_indexed
+from cover_art import COVER_SIZE
+
+# Schritte des wandernden Stücks im Scan-Balken pro Richtung (zwei Schritte pro Sekunde)
+SCAN_SEGMENT_STEPS = 6
+
+
+def fill_rect(surface, color, rect=None):
+    """Surface.fill, bei 8-Bit-Surfaces über palette.fill (SDL füllt diese sehr langsam)."""
+    if surface.get_bytesize() == 1:
+        fill_indexed(surface, color, rect)
+    else:
+        surface.fill(color, rect)
+
+
+class TextCache:
+    """
+    LRU-Cache für gerenderte Texte, Schlüssel ist (Text, Font, Farbe).
+    indexed: Farbe ist ein Paletten-Index, Texte werden als 8-Bit-Surfaces gerendert.
+    """
+
+    def __init__(self, max_entries=128, indexed=False):
+        self.max_entries = max_entries
+        self.indexed = indexed
+        self.surfaces = OrderedDict()
+
+    def render(self, font, text, color):
+        key = (text, id(font), color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        if self.indexed:
+            surface = render_text(font, text, color)
+        else:
+            surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+class Marquee:
+    """
+    Laufschrift: Der Text wird einmal als doppelter Streifen vorgerendert,
+    pro Frame wird nur noch ein Ausschnitt davon geblittet.
+    """
+
+    def __init__(self):
+        self.source = None
+        self.key = None
+        self.strip = None
+        self.text_width = 0
+
+    def draw(self, screen, text_surface, bg, area, offset):
+        key = (bg, area.size)
+        if text_surface is not self.source or key != self.key:
+            self.text_width = text_surface.get_width()
+            self.strip = surface_like(screen, (self.text_width + area.width, area.height))
+            fill_rect(self.strip, bg)
+            self.strip.blit(text_surface, (0, 0))
+            # Anfang des Texts hinten anhängen für nahtloses Scrollen
+            self.strip.blit(text_surface, (self.text_width, 0))
+            self.source = text_surface
+            self.key = key
+        scroll_pos = offset % self.text_width
+        screen.blit(self.strip, area.topleft, (scroll_pos, 0, area.width, area.height))
+
+    def reset(self):
+        self.source = None
+        self.key = None
+        self.strip = None
+
+
+class LayerCache:
+    """
+    Vorgezeichnete statische Ebenen (Hintergrund, Titel, Icons, ...) pro
+    Bildschirm, Theme und Größe. Pro Zielfläche wird gemerkt, welche Ebene
+    darauf liegt und welche Bereiche seitdem übermalt wurden (damage). Liegt
+    beim nächsten Frame dieselbe Ebene darunter, werden nur diese Bereiche
+    aus der Ebene wiederhergestellt statt den ganzen Bildschirm neu zu zeichnen.
+    """
+
+    def __init__(self, max_layers=16):
+        self.max_layers = max_layers
+        self.layers = OrderedDict()
+        # Zielfläche -> (Ebene, beschädigte Rechtecke); schwache Referenzen, damit
+        # der Speicher der FramePipeline-Surfaces freigegeben werden kann
+        self.targets = weakref.WeakKeyDictionary()
+        self.stats = {"full": 0, "partial": 0, "rects": 0}
+
+    def get(self, screen, key, size, draw):
+        """Ebene zu key; draw(surface) zeichnet sie beim ersten Mal."""
+        layer = self.layers.get(key)
+        if layer is not None:
+            self.layers.move_to_end(key)
+            return layer
+        layer = surface_like(screen, size)
+        draw(layer)
+        self.layers[key] = layer
+        if len(self.layers) > self.max_layers:
+            self.layers.popitem(last=False)
+        return layer
+
+    def begin(self, screen, key, draw):
+        """Legt die Ebene key als Hintergrund auf screen; danach nur noch die dynamischen Teile zeichnen."""
+        layer = self.get(screen, key, screen.get_size(), draw)
+        target = self.targets.get(screen)
+        if target is not None and target[0] is layer:
+            for rect in target[1]:
+                screen.blit(layer, rect, rect)
+            self.stats["partial"] += 1
+            self.stats["rects"] += len(target[1])
+        else:
+            screen.blit(layer, (0, 0))
+            self.stats["full"] += 1
+        self.targets[screen] = (layer, [])
+
+    def damage(self, screen, rect):
+        """Meldet einen Bereich, der über die Ebene gezeichnet wurde."""
+        target = self.targets.get(screen)
+        if target is not None:
+            target[1].append(pygame.Rect(rect))
+
+    def forget(self, screen):
+        """screen wurde ohne Ebene gezeichnet; beim nächsten begin() ganz blitten."""
+        self.targets.pop(screen, None)
+
 
 class UserInterface:
-    def __init__(self, width, height):
+    def __init__(self, width, height, palette_mode=False):
+        """
+        palette_mode: in 8-Bit-Surfaces mit Farbrollen zeichnen (siehe palette.py),
+        die Farben des Themes stehen dann in self.palette.
+        """
         self.width = width
         self.height = height
         pygame.font.init()
         self.font = pygame.font.Font('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', 14)
         self.title_font = pygame.font.Font('/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf', 16)
         self.play_font = pygame.font.SysFont(None, 18)
+        # Platz für das Cover zwischen Zeitanzeige und Icons. Das Bild setzt das
+        # Display direkt in den RGB565-Frame ein (siehe Rgb565Display.set_overlay).
+        self.cover_position = ((width - COVER_SIZE) // 2, 70)
 
         # --- THEME IMPLEMENTIERUNG ---
         self.themes = [
-            {"bg": (0, 0, 0), "fg": (0, 215, 0), "highlight": (0, 215, 0), "text_selected": (0,0,0), "indicator":  (255, 50, 50)}, # Original
-            {"bg": (20, 20, 40), "fg": (200, 200, 255), "highlight": (100, 100, 255), "text_selected": (255,255,255), "indicator":  (255, 100, 100)}, # Dunkelblau
-            {"bg": (255, 255, 255), "fg": (50, 50, 50), "highlight": (100, 100, 100), "text_selected": (0,0,0), "indicator":  (255, 0, 0)} # Hell
+            {"bg": (0, 0, 0), "fg": (0, 215, 0), "highlight": (0, 215, 0), "text_selected": (0,0,0), "indicator":  (255, 50, 50), "track": (50, 50, 50), "track_rms": (90, 90, 90)}, # Original
+            {"bg": (20, 20, 40), "fg": (200, 200, 255), "highlight": (100, 100, 255), "text_selected": (255,255,255), "indicator":  (255, 100, 100), "track": (50, 50, 50), "track_rms": (90, 90, 90)}, # Dunkelblau
+            {"bg": (255, 255, 255), "fg": (50, 50, 50), "highlight": (100, 100, 100), "text_selected": (0,0,0), "indicator":  (255, 0, 0), "track": (50, 50, 50), "track_rms": (90, 90, 90)} # Hell
         ]
-        self.current_theme = self.themes[0]
+        self.palette_mode = palette_mode
+        if palette_mode:
+            # Gezeichnet wird mit den Rollen-Indizes, die Farben liefert die Palette
+            self.current_theme = PALETTE_ROLES
+            self.palette = build_palette(self.themes[0])
+        else:
+            self.current_theme = self.themes[0]
+            self.palette = None
+
+        # Gerenderte Texte und Laufschriften wiederverwenden statt pro Frame neu zu erzeugen
+        self.text_cache = TextCache(indexed=palette_mode)
+        self.list_marquee = Marquee()
+        self.title_marquee = Marquee()
+        # Vorgezeichnete Waveform (gespielt/offen) des aktuellen Titels
+        self.waveform_source = None
+        self.waveform_theme = None
+        self.waveform_surfaces = None
+        # Schrift für das Debug-Overlay erst bei Bedarf laden
+        self.debug_font = None
+        # Statische Teile der Bildschirme, einmal pro Theme vorgezeichnet
+        self.layers = LayerCache()
+
+    def create_surface(self, size):
+        """Zeichenfläche im Format der UI (8 Bit im Palettenmodus)."""
+        if self.palette_mode:
+            return create_surface(size)
+        return pygame.Surface(size)
 
     def set_theme(self, theme_index):
+        if self.palette_mode:
+            # Nur die Palette tauschen; Caches enthalten Indizes und bleiben gültig
+            if 0 <= theme_index < len(self.themes):
+                self.palette = build_palette(self.themes[theme_index])
+            return
         if 0 <= theme_index < len(self.themes):
             self.current_theme = self.themes[theme_index]
+            # Farben haben sich geändert - alle gerenderten Texte verwerfen
+            self.text_cache.clear()
+            self.list_marquee.reset()
+            self.title_marquee.reset()
             
             
             # --- NEUE ICON-ZEICHENFUNKTIONEN ---
@@ -59,44 +235,55 @@ class UserInterface:
         pygame.draw.polygon(surface, color, points2)
 
     def draw_generic_menu(self, screen, options, selected, title):
-        screen.fill(self.current_theme["bg"])
+        theme = self.current_theme
         line_height = self.font.get_linesize() + 5
 
-        # Titel
-        title_surface = self.title_font.render(title, True, self.current_theme["fg"])
-        screen.blit(title_surface, ((self.width - title_surface.get_width()) // 2, 10))
+        def draw_static(layer):
+            # Titel und alle Einträge unmarkiert
+            fill_rect(layer, theme["bg"])
+            title_surface = self.text_cache.render(self.title_font, title, theme["fg"])
+            layer.blit(title_surface, ((self.width - title_surface.get_width()) // 2, 10))
+            for i, option_text in enumerate(options):
+                text_surface = self.text_cache.render(self.font, option_text, theme["fg"])
+                layer.blit(text_surface, (15, 40 + i * line_height + (line_height - text_surface.get_height()) // 2))
 
-        y = 40
-        for i, option_text in enumerate(options):
-            if i == selected:
-                pygame.draw.rect(screen, self.current_theme["highlight"], (5, y, self.width - 10, line_height))
-                text_color = self.current_theme["text_selected"]
-            else:
-                text_color = self.current_theme["fg"]
+        self.layers.begin(screen, ("menu", title, tuple(options), id(theme), screen.get_size()), draw_static)
+
+        # Nur die Markierung ist dynamisch
+        if 0 <= selected < len(options):
+            row = pygame.Rect(5, 40 + selected * line_height, self.width - 10, line_height)
+            fill_rect(screen, theme["highlight"], row)
+            text_surface = self.text_cache.render(self.font, options[selected], theme["text_selected"])
+            text_rect = screen.blit(text_surface, (15, row.y + (line_height - text_surface.get_height()) // 2))
+            self.layers.damage(screen, row.union(text_rect))
 
-            text_surface = self.font.render(option_text, True, text_color)
-            screen.blit(text_surface, (15, y + (line_height - text_surface.get_height()) // 2))
-            y += line_height
      # Umbenannt von draw_main_menu zu draw_all_songs_menu
-    def draw_all_songs_menu(self, screen, files, selected, current_song_index, paused, h_scroll, v_scroll):
-        screen.fill(self.current_theme["bg"])
-        y = 5 - v_scroll
+    def draw_all_songs_menu(self, screen, titles, selected, current_song_index, paused, h_scroll, v_scroll):
+        self._draw_scrolling_list(screen, titles, selected, current_song_index, paused, h_scroll, v_scroll)
+
+    def draw_list_menu(self, screen, items, selected, h_scroll, v_scroll):
+        """Scrollbare Liste ohne Wiedergabe-Indikator (Interpreten, Alben)."""
+        self._draw_scrolling_list(screen, items, selected, None, False, h_scroll, v_scroll)
+
+    def _draw_scrolling_list(self, screen, titles, selected, current_song_index, paused, h_scroll, v_scroll):
+        # Beim Scrollen ändert sich fast alles, hier lohnt keine Ebene
+        self.layers.forget(screen)
+        fill_rect(screen, self.current_theme["bg"])
         spacing = 2
         line_height = self.font.get_linesize() + spacing
 
-        for i, filename in enumerate(files):
-            # Nur im sichtbaren Bereich zeichnen
-            if y > self.height or y + line_height < 0:
-                y += line_height
-                continue
+        # Sichtbaren Bereich direkt aus v_scroll berechnen, statt alle Zeilen abzulaufen
+        first = max(0, (v_scroll - 5) // line_height)
+        last = min(len(titles), (v_scroll - 5 + self.height) // line_height + 1)
+        y = 5 + first * line_height - v_scroll
 
-            base_title = os.path.splitext(filename)[0]
-            display_title = base_title + "   " # Add padding for scrolling
+        for i in range(first, last):
+            display_title = titles[i] + "   " # Add padding for scrolling
             
             # Farben setzen
             text_color = self.current_theme["fg"]
             if i == selected:
-                pygame.draw.rect(screen, self.current_theme["highlight"], (0, y, self.width, line_height))
+                fill_rect(screen, self.current_theme["highlight"], (0, y, self.width, line_height))
                 text_color = self.current_theme["text_selected"]
 
             # Wiedergabe-Indikator
@@ -110,23 +297,14 @@ class UserInterface:
                     pygame.draw.polygon(screen, indicator_color, [(5, indicator_y_pos), (5, indicator_y_pos + 8), (12, indicator_y_pos + 4)])
 
             # Scrolling für lange Titel
-            text_surface = self.font.render(display_title, True, text_color)
+            text_surface = self.text_cache.render(self.font, display_title, text_color)
             text_width = text_surface.get_width()
             
             text_area = pygame.Rect(17, y, self.width - 30, line_height)
             
             if i == selected and text_width > text_area.width:
-                scroll_pos = h_scroll % text_width
-                # Erstelle eine temporäre Oberfläche für den Text, um das Clipping zu erleichtern
-                temp_surface = pygame.Surface(text_area.size, pygame.SRCALPHA)
-                temp_surface.fill(self.current_theme["highlight"]) # Hintergrundfarbe für den Auswahlbalken
-                temp_surface.blit(text_surface, (0,0), (scroll_pos, 0, text_area.width, line_height))
-                
-                # Teil 2 für nahtloses Scrollen
-                if scroll_pos + text_area.width > text_width:
-                    remaining_width = text_width - scroll_pos
-                    temp_surface.blit(text_surface, (remaining_width, 0), (0, 0, text_area.width - remaining_width, line_height))
-                screen.blit(temp_surface, text_area.topleft)
+                # Hintergrundfarbe für den Auswahlbalken
+                self.list_marquee.draw(screen, text_surface, self.current_theme["highlight"], text_area, h_scroll)
             else:
                 # Clipping, damit der Text nicht über den Rand hinausragt
                 screen.set_clip(text_area)
@@ -135,42 +313,160 @@ class UserInterface:
 
             y += line_height
 
-    def draw_play_menu(self, screen, current_file, progress, elapsed, total, playing, scroll_offset, volume, last_volume_change_time, VOLUME_DISPLAY_DURATION ):
-        screen.fill(self.current_theme["bg"])
-        font = pygame.font.SysFont(None, 18)
+    def draw_scan_progress(self, screen, progress):
+        """
+        Schmaler Fortschrittsbalken am unteren Rand, solange die Bibliothek
+        gescannt wird. progress None: Anteil noch unbekannt, dann wandert ein
+        kurzes Stück hin und her statt eines Balkens, der zurückspringt.
+        """
+        bar_height = 3
+        y = self.height - bar_height
+        fill_rect(screen, self.current_theme["bg"], (0, y, self.width, bar_height))
+        if progress is None:
+            segment = self.width // 4
+            travel = self.width - segment
+            step = int(time.time() * 2) % (2 * SCAN_SEGMENT_STEPS)
+            x = travel * min(step, 2 * SCAN_SEGMENT_STEPS - step) // SCAN_SEGMENT_STEPS
+            fill_rect(screen, self.current_theme["indicator"], (x, y, segment, bar_height))
+        else:
+            fill_rect(screen, self.current_theme["indicator"], (0, y, int(self.width * progress), bar_height))
+        self.layers.damage(screen, (0, y, self.width, bar_height))
+
+    def draw_splash(self, screen, text):
+        """Startbild, solange Bibliothek und VLC noch laden."""
+        self.layers.forget(screen)
+        fill_rect(screen, self.current_theme["bg"])
+        title_surface = self.text_cache.render(self.title_font, "Music Player", self.current_theme["fg"])
+        screen.blit(title_surface, ((self.width - title_surface.get_width()) // 2, self.height // 2 - 20))
+        text_surface = self.text_cache.render(self.font, text, self.current_theme["fg"])
+        screen.blit(text_surface, ((self.width - text_surface.get_width()) // 2, self.height // 2 + 5))
+
+    def draw_jump_label(self, screen, label):
+        """Großer Buchstabe in der Mitte, solange der Sprungmodus aktiv ist."""
+        label_surface = self.text_cache.render(self.title_font, label, self.current_theme["text_selected"])
+        box = pygame.Rect(0, 0, max(40, label_surface.get_width() + 16), 34)
+        box.center = (self.width // 2, self.height // 2)
+        fill_rect(screen, self.current_theme["highlight"], box)
+        self.layers.damage(screen, box.union(screen.blit(label_surface, label_surface.get_rect(center=box.center))))
+
+    def draw_toast(self, screen, text):
+        """Kurze Meldung am unteren Rand, z.B. nach dem Einreihen eines Titels."""
+        text_surface = self.text_cache.render(self.font, text, self.current_theme["text_selected"])
+        box = pygame.Rect(0, 0, min(self.width - 8, text_surface.get_width() + 12), text_surface.get_height() + 6)
+        box.midbottom = (self.width // 2, self.height - 4)
+        fill_rect(screen, self.current_theme["highlight"], box)
+        self.layers.damage(screen, box)
+        screen.blit(text_surface, text_surface.get_rect(center=box.center), area=pygame.Rect(0, 0, box.width - 6, box.height))
+
+    def draw_debug_overlay(self, screen, lines):
+        """Halbtransparente Tabelle mit Profiler-Werten (Stufe, p50, p95 in ms)."""
+        if self.debug_font is None:
+            self.debug_font = pygame.font.Font('/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf', 9)
+        line_height = self.debug_font.get_linesize()
+        lines = ["stage       p50   p95"] + lines
+        lines = lines[:self.height // line_height]
+        overlay_height = len(lines) * line_height + 2
+        self.layers.damage(screen, (0, 0, self.width, overlay_height))
+        if self.palette_mode:
+            # Ohne Überblenden: Mischfarben gibt es in der Palette nicht
+            fill_indexed(screen, self.current_theme["overlay_bg"], (0, 0, self.width, overlay_height))
+        else:
+            overlay = pygame.Surface((self.width, overlay_height))
+            overlay.set_alpha(200)
+            overlay.fill((0, 0, 0))
+            screen.blit(overlay, (0, 0))
+        # Werte ändern sich ständig, daher nicht über den text_cache
+        for i, line in enumerate(lines):
+            if self.palette_mode:
+                line_surface = render_text(self.debug_font, line, self.current_theme["overlay_fg"])
+            else:
+                line_surface = self.debug_font.render(line, False, (255, 255, 0))
+            screen.blit(line_surface, (2, 1 + i * line_height))
+
+    def _build_waveform_surfaces(self, screen, waveform, width, height):
+        """Zeichnet die Hüllkurve einmal in zwei Farben; pro Frame wird nur noch geblittet."""
+        peaks, rms = waveform
+        # Auf den lautesten Peak des Titels normieren, damit leise Aufnahmen nicht flach wirken
+        scale = (height / 2 - 1) / max(1, max(peaks))
+        middle = height // 2
+        surfaces = []
+        theme = self.current_theme
+        for peak_color, rms_color in ((theme["track"], theme["track_rms"]), (theme["highlight"], theme["fg"])):
+            surface = surface_like(screen, (width, height))
+            fill_rect(surface, self.current_theme["bg"])
+            for x in range(min(width, len(peaks))):
+                peak = max(1, int(peaks[x] * scale))
+                pygame.draw.line(surface, peak_color, (x, middle - peak), (x, middle + peak))
+                level = int(rms[x] * scale)
+                if level:
+                    pygame.draw.line(surface, rms_color, (x, middle - level), (x, middle + level))
+            surfaces.append(surface)
+        return surfaces
+
+    def draw_play_menu(self, screen, current_file, progress, elapsed, total, playing, scroll_offset, volume, last_volume_change_time, VOLUME_DISPLAY_DURATION, waveform=None):
+        theme = self.current_theme
+        font = self.play_font
+        bar_y = 40
+        bar_height = 10
+
+        # --- ICONS WERDEN JETZT MIT PYGAME GEZEICHNET ---
+        icon_y = self.height - 25
+        center_x = self.width // 2
+        icon_spacing = 30
+        icon_size = (14, 14) # (Breite, Höhe)
+
+        icon_color = theme["highlight"]
+
+        # Positionen für die Icons berechnen
+        prev_pos = (center_x - icon_spacing - icon_size[0], icon_y)
+        play_pause_pos = (center_x - icon_size[0] // 2, icon_y)
+        next_pos = (center_x + icon_spacing, icon_y)
+
+        def draw_static(layer):
+            # Hintergrund, Balken-Hintergrund und die festen Icons
+            fill_rect(layer, theme["bg"])
+            fill_rect(layer, theme["track"], (10, bar_y, self.width - 20, bar_height))
+            self._draw_prev_icon(layer, icon_color, prev_pos, icon_size)
+            self._draw_next_icon(layer, icon_color, next_pos, icon_size)
+
+        self.layers.begin(screen, ("play", id(theme), screen.get_size()), draw_static)
 
          # Scrolling für Play-Screen Titel
         title_text = current_file + "   "
-        title_surface = self.play_font.render(title_text, True, self.current_theme["fg"])
+        title_surface = self.text_cache.render(self.play_font, title_text, theme["fg"])
         title_width = title_surface.get_width()
         
         title_area = pygame.Rect(10, 10, self.width - 20, 20)
         
         if title_width > title_area.width:
-            scroll_pos = scroll_offset % title_width
-            temp_surface = pygame.Surface(title_area.size, pygame.SRCALPHA)
-            temp_surface.fill(self.current_theme["bg"])
-            temp_surface.blit(title_surface, (0,0), (scroll_pos, 0, title_area.width, 20))
-            if scroll_pos + title_area.width > title_width:
-                remaining_width = title_width - scroll_pos
-                temp_surface.blit(title_surface, (remaining_width, 0), (0, 0, title_area.width - remaining_width, 20))
-            screen.blit(temp_surface, title_area.topleft)
+            self.title_marquee.draw(screen, title_surface, theme["bg"], title_area, scroll_offset)
+            self.layers.damage(screen, title_area)
         else:
-            screen.blit(title_surface, (title_area.x + (title_area.width - title_width) // 2, title_area.y))
+            self.layers.damage(screen, screen.blit(title_surface, (title_area.x + (title_area.width - title_width) // 2, title_area.y)))
 
         # Fortschrittsbalken
-        bar_y = 40
-        bar_height = 10
-        pygame.draw.rect(screen, (50, 50, 50), (10, bar_y, self.width - 20, bar_height))
         prog_width = int((self.width - 20) * progress)
-        pygame.draw.rect(screen, self.current_theme["highlight"], (10, bar_y, prog_width, bar_height))
+        if waveform:
+            # Waveform statt Balken, etwas höher und um die Balkenmitte zentriert
+            wave_height = 18
+            if waveform is not self.waveform_source or theme is not self.waveform_theme:
+                self.waveform_surfaces = self._build_waveform_surfaces(screen, waveform, self.width - 20, wave_height)
+                self.waveform_source = waveform
+                self.waveform_theme = theme
+            rest, played = self.waveform_surfaces
+            wave_y = bar_y + bar_height // 2 - wave_height // 2
+            self.layers.damage(screen, screen.blit(rest, (10, wave_y)))
+            screen.blit(played, (10, wave_y), (0, 0, prog_width, wave_height))
+        else:
+            fill_rect(screen, theme["highlight"], (10, bar_y, prog_width, bar_height))
+            self.layers.damage(screen, (10, bar_y, prog_width, bar_height))
 
         # Zeit
         cur_min, cur_sec = divmod(int(elapsed), 60)
         tot_min, tot_sec = divmod(int(total), 60)
         time_text = f"{cur_min:02d}:{cur_sec:02d} / {tot_min:02d}:{tot_sec:02d}"
-        time_surface = font.render(time_text, True, self.current_theme["fg"])
-        screen.blit(time_surface, ((self.width - time_surface.get_width()) // 2, bar_y + bar_height + 5))
+        time_surface = self.text_cache.render(font, time_text, theme["fg"])
+        self.layers.damage(screen, screen.blit(time_surface, ((self.width - time_surface.get_width()) // 2, bar_y + bar_height + 5)))
         
         # Lautstärkeindikator nur anzeigen, wenn kürzlich die Lautstärke geändert wurde
         if time.time() - last_volume_change_time < VOLUME_DISPLAY_DURATION:
@@ -178,35 +474,27 @@ class UserInterface:
             vol_bar_height = 8
             vol_x = (self.width - vol_bar_width) // 2
             vol_y = bar_y + bar_height + 20
-            # Rahmen für den Balken
-            pygame.draw.rect(screen, self.current_theme["highlight"], (vol_x, vol_y, vol_bar_width, vol_bar_height), 1)
+            vol_text_surface = self.text_cache.render(font, "Vol:", theme["fg"])
+            vol_left = vol_x - vol_text_surface.get_width() - 5
+
+            def draw_volume_frame(layer):
+                # Beschriftung "Vol" und Rahmen für den Balken
+                fill_rect(layer, theme["bg"])
+                layer.blit(vol_text_surface, (0, 0))
+                pygame.draw.rect(layer, theme["highlight"], (vol_x - vol_left, 0, vol_bar_width, vol_bar_height), 1)
+
+            frame_size = (vol_x + vol_bar_width - vol_left, max(vol_text_surface.get_height(), vol_bar_height))
+            volume_frame = self.layers.get(screen, ("volume", id(theme), frame_size), frame_size, draw_volume_frame)
+            self.layers.damage(screen, screen.blit(volume_frame, (vol_left, vol_y)))
             # Füllung entsprechend der aktuellen Lautstärke
             filled_width = int(vol_bar_width * volume)
-            pygame.draw.rect(screen, self.current_theme["fg"], (vol_x, vol_y, filled_width, vol_bar_height))
-            # Optional: Beschriftung "Vol" neben dem Balken
-            vol_text_surface = font.render("Vol:", True, self.current_theme["fg"])
-            screen.blit(vol_text_surface, (vol_x - vol_text_surface.get_width() - 5, vol_y))
+            fill_rect(screen, theme["fg"], (vol_x, vol_y, filled_width, vol_bar_height))
 
-        # --- ICONS WERDEN JETZT MIT PYGAME GEZEICHNET ---
-        icon_y = self.height - 25
-        center_x = self.width // 2
-        icon_spacing = 30
-        icon_size = (14, 14) # (Breite, Höhe)
-        
-        icon_color = self.current_theme["highlight"]
-        
-        # Positionen für die Icons berechnen
-        prev_pos = (center_x - icon_spacing - icon_size[0], icon_y)
-        play_pause_pos = (center_x - icon_size[0] // 2, icon_y)
-        next_pos = (center_x + icon_spacing, icon_y)
-
-        # Icons mit der Theme-Farbe zeichnen
-        self._draw_prev_icon(screen, icon_color, prev_pos, icon_size)
-        self._draw_next_icon(screen, icon_color, next_pos, icon_size)
-        
+        # Nur Play/Pause wechselt, Zurück/Weiter liegen in der Ebene
         if playing:
             self._draw_pause_icon(screen, icon_color, play_pause_pos, icon_size)
         else:
             self._draw_play_icon(screen, icon_color, play_pause_pos, icon_size)
+        self.layers.damage(screen, (play_pause_pos[0], play_pause_pos[1], icon_size[0] + 1, icon_size[1] + 1))
 
         
@@ -0,0 +1,370 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import threading
+import wave
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from library_index import LibraryIndex
+
+# Eine Spalte pro Pixel des Fortschrittsbalkens (160 - 2 * 10)
+WAVEFORM_COLUMNS = 140
+# Für Hüllkurve und Lautheit reicht eine niedrige Abtastrate, das spart Rechenzeit.
+# Die K-Gewichtung der Lautheitsmessung braucht aber Frequenzen bis einige kHz.
+DECODE_SAMPLE_RATE = 16000
+DECODE_TIMEOUT = 120
+# Gelesen wird in Stücken dieser Länge, nie die ganze Datei auf einmal
+CHUNK_SECONDS = 1.0
+# Auflösung der Hüllkurve vor dem Zusammenfassen auf WAVEFORM_COLUMNS
+ENVELOPE_BLOCK_SECONDS = 0.01
+# Lautheit nach ITU-R BS.1770: 400-ms-Messblöcke mit 75 % Überlappung = je 4 Teilblöcke
+LOUDNESS_SUBBLOCKS = 4
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+# Ziel-Lautheit wie bei ReplayGain 2 und höchste Anhebung
+REFERENCE_LOUDNESS = -18.0
+MAX_GAIN_DB = 12.0
+# Ohne fehlende Analysen nur in diesem Abstand nachsehen (neue Dateien)
+IDLE_INTERVAL = 10.0
+BATCH_SIZE = 20
+
+
+def _lower_priority():
+    """Läuft in jedem Worker: niedrigste CPU-Priorität, damit die Wiedergabe nie leidet."""
+    try:
+        os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+    except (AttributeError, OSError):
+        try:
+            os.nice(19)
+        except OSError:
+            pass
+
+
+def _to_float(frames, width, channels):
+    """Rohe PCM-Bytes als (Frames, Kanäle)-float32-Array (-1..1)."""
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648
+    else:
+        return None
+    samples = samples[:len(samples) // channels * channels].reshape(-1, channels)
+    if channels > 2:
+        samples = samples.mean(axis=1, keepdims=True)
+    return samples
+
+
+def _stream_wav(path, analysis):
+    with wave.open(path, "rb") as f:
+        width = f.getsampwidth()
+        channels = f.getnchannels()
+        analysis.start(f.getframerate())
+        chunk_frames = max(1, int(f.getframerate() * CHUNK_SECONDS))
+        while True:
+            frames = f.readframes(chunk_frames)
+            if not frames:
+                return True
+            samples = _to_float(frames, width, channels)
+            if samples is None:
+                return False
+            analysis.add(samples)
+
+
+def _stream_ffmpeg(path, analysis):
+    # Stereo, niedrige Rate, 16 Bit roh auf stdout; gelesen wird stückweise
+    process = subprocess.Popen(
+        ["ffmpeg", "-v", "quiet", "-i", path, "-ac", "2", "-ar", str(DECODE_SAMPLE_RATE), "-f", "s16le", "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    timer = threading.Timer(DECODE_TIMEOUT, process.kill)
+    timer.start()
+    try:
+        analysis.start(DECODE_SAMPLE_RATE)
+        chunk_bytes = int(DECODE_SAMPLE_RATE * CHUNK_SECONDS) * 4
+        while True:
+            frames = process.stdout.read(chunk_bytes)
+            if not frames:
+                break
+            analysis.add(_to_float(frames[:len(frames) // 4 * 4], 2, 2))
+        return process.wait() == 0
+    finally:
+        timer.cancel()
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def decode_stream(path, analysis):
+    """Dekodiert eine Datei stückweise in analysis; False, wenn das nicht geht."""
+    if path.lower().endswith(".wav"):
+        try:
+            if _stream_wav(path, analysis):
+                return True
+        except (wave.Error, EOFError, OSError):
+            pass
+    if shutil.which("ffmpeg") is None:
+        return False
+    try:
+        return _stream_ffmpeg(path, analysis)
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def _biquad_power(b, a, frequencies, rate):
+    """|H|^2 eines Biquads an den gegebenen Frequenzen."""
+    z = np.exp(-1j * 2 * np.pi * frequencies / rate)
+    numerator = b[0] + b[1] * z + b[2] * z * z
+    denominator = a[0] + a[1] * z + a[2] * z * z
+    return np.abs(numerator / denominator) ** 2
+
+
+def k_weighting(frequencies, rate):
+    """Leistungsgewichte der K-Gewichtung (Höhen-Shelf +4 dB, Hochpass 38 Hz) nach BS.1770."""
+    w0 = 2 * np.pi * 1500.0 / rate
+    gain = 10 ** (4.0 / 40)
+    alpha = np.sin(w0) / (2 * np.sqrt(0.5))
+    cos = np.cos(w0)
+    shelf_b = (
+        gain * ((gain + 1) + (gain - 1) * cos + 2 * np.sqrt(gain) * alpha),
+        -2 * gain * ((gain - 1) + (gain + 1) * cos),
+        gain * ((gain + 1) + (gain - 1) * cos - 2 * np.sqrt(gain) * alpha),
+    )
+    shelf_a = (
+        (gain + 1) - (gain - 1) * cos + 2 * np.sqrt(gain) * alpha,
+        2 * ((gain - 1) - (gain + 1) * cos),
+        (gain + 1) - (gain - 1) * cos - 2 * np.sqrt(gain) * alpha,
+    )
+    w0 = 2 * np.pi * 38.0 / rate
+    alpha = np.sin(w0) / (2 * 0.5)
+    cos = np.cos(w0)
+    highpass_b = ((1 + cos) / 2, -(1 + cos), (1 + cos) / 2)
+    highpass_a = (1 + alpha, -2 * cos, 1 - alpha)
+    return _biquad_power(shelf_b, shelf_a, frequencies, rate) * _biquad_power(highpass_b, highpass_a, frequencies, rate)
+
+
+class TrackAnalysis:
+    """
+    Sammelt beim Dekodieren blockweise Hüllkurve, Lautheit und Spitzenpegel,
+    sodass nie mehr als ein Stück der Datei im Speicher liegt. Die
+    K-Gewichtung wird pro 100-ms-Teilblock im Frequenzbereich angewendet
+    (FFT, Gewichte, Parseval) - vektorisiert statt Sample für Sample zu filtern.
+    """
+
+    def __init__(self):
+        self.rate = None
+
+    def start(self, rate):
+        self.rate = rate
+        self.envelope_block = max(1, int(rate * ENVELOPE_BLOCK_SECONDS))
+        # Ein Teilblock (100 ms) besteht aus 10 Hüllkurven-Blöcken
+        self.loudness_block = self.envelope_block * 10
+        n = self.loudness_block
+        weights = k_weighting(np.fft.rfftfreq(n, 1.0 / rate), rate)
+        # Parseval für rfft: alle Bins außer Gleichanteil (und ggf. Nyquist) zählen doppelt
+        weights[1:(n + 1) // 2] *= 2
+        self.weights = (weights / (n * n)).astype(np.float32)
+        self.pending = None
+        self.block_peaks = []
+        self.block_squares = []
+        self.block_powers = []
+        self.peak = 0.0
+
+    def add(self, samples):
+        """samples: (Frames, Kanäle)-Array mit 1 oder 2 Kanälen."""
+        if self.pending is not None:
+            samples = np.concatenate((self.pending, samples))
+        usable = len(samples) // self.loudness_block * self.loudness_block
+        self.pending = samples[usable:].copy()
+        if usable:
+            self._add_blocks(samples[:usable], with_loudness=True)
+
+    def _add_blocks(self, samples, with_loudness):
+        channels = samples.shape[1]
+        if len(samples):
+            self.peak = max(self.peak, float(np.abs(samples).max()))
+        mono = samples.mean(axis=1)
+        blocks = mono.reshape(-1, self.envelope_block)
+        self.block_peaks.append(np.abs(blocks).max(axis=1))
+        self.block_squares.append(np.square(blocks).sum(axis=1))
+        if with_loudness:
+            # (Teilblöcke, Kanäle, Samples) -> gewichtete mittlere Leistung, über die Kanäle summiert
+            sub = samples.reshape(-1, self.loudness_block, channels).transpose(0, 2, 1)
+            spectrum = np.fft.rfft(sub, axis=2)
+            power = (np.square(spectrum.real) + np.square(spectrum.imag)) @ self.weights
+            # Mono zählt wie zwei gleiche Kanäle, damit es so laut misst wie als Stereo
+            self.block_powers.append(power.sum(axis=1) * (2 / channels))
+
+    def finish(self):
+        """(peaks, rms, loudness, peak): Hüllkurve als uint8-Arrays, Lautheit in LUFS (None bei Stille)."""
+        if self.rate is None:
+            return None
+        if self.pending is not None and len(self.pending):
+            # Rest auffüllen; für die Lautheit zu kurz, für die Hüllkurve reicht es
+            tail = -len(self.pending) % self.envelope_block
+            padded = np.concatenate((self.pending, np.zeros((tail, self.pending.shape[1]), dtype=self.pending.dtype)))
+            self._add_blocks(padded, with_loudness=False)
+        if not self.block_peaks:
+            return None
+        envelope = compute_envelope(np.concatenate(self.block_peaks), np.concatenate(self.block_squares), self.envelope_block)
+        powers = np.concatenate(self.block_powers) if self.block_powers else np.zeros(0)
+        return envelope[0], envelope[1], integrated_loudness(powers), self.peak
+
+
+def compute_envelope(block_peaks, block_squares, block_size, columns=WAVEFORM_COLUMNS):
+    """Fasst die Blöcke zu Peak und RMS pro Spalte zusammen, als uint8-Arrays (0-255 = 0 bis Vollaussteuerung)."""
+    # Jede Spalte bekommt mindestens einen Block (sehr kurze Titel wiederholen Blöcke)
+    starts = np.arange(columns) * len(block_peaks) // columns
+    counts = np.diff(np.append(starts, len(block_peaks))).clip(min=1)
+    peaks = np.maximum.reduceat(block_peaks, starts)
+    rms = np.sqrt(np.add.reduceat(block_squares, starts) / (counts * block_size))
+    return (
+        (np.clip(peaks, 0, 1) * 255).astype(np.uint8),
+        (np.clip(rms, 0, 1) * 255).astype(np.uint8),
+    )
+
+
+def _loudness(power):
+    return -0.691 + 10 * np.log10(np.maximum(power, 1e-20))
+
+
+def integrated_loudness(subblock_powers):
+    """Lautheit in LUFS aus den Leistungen der 100-ms-Teilblöcke, mit absolutem und relativem Gate."""
+    if len(subblock_powers) >= LOUDNESS_SUBBLOCKS:
+        windows = np.convolve(subblock_powers, np.full(LOUDNESS_SUBBLOCKS, 1.0 / LOUDNESS_SUBBLOCKS), mode="valid")
+    else:
+        windows = np.asarray(subblock_powers, dtype=np.float64)
+    windows = windows[_loudness(windows) > ABSOLUTE_GATE]
+    if len(windows) == 0:
+        return None
+    threshold = _loudness(windows.mean()) + RELATIVE_GATE
+    windows = windows[_loudness(windows) > threshold]
+    return float(_loudness(windows.mean()))
+
+
+def replay_gain(loudness, peak):
+    """Linearer Faktor auf REFERENCE_LOUDNESS, begrenzt auf MAX_GAIN_DB und so, dass der Spitzenpegel nicht übersteuert."""
+    gain_db = min(REFERENCE_LOUDNESS - loudness, MAX_GAIN_DB)
+    if peak > 0:
+        gain_db = min(gain_db, -20 * np.log10(peak))
+    return float(10 ** (gain_db / 20))
+
+
+def analyze_track(path):
+    """
+    Läuft im Worker-Prozess, dekodiert die Datei genau einmal. Gibt
+    (peaks, rms, loudness, peak) zurück; peaks/rms als bytes, leer bei
+    Fehlern, loudness None, wenn der Titel nicht messbar ist.
+    """
+    analysis = TrackAnalysis()
+    result = analysis.finish() if decode_stream(path, analysis) else None
+    if result is None:
+        return b"", b"", None, None
+    peaks, rms, loudness, peak = result
+    return peaks.tobytes(), rms.tobytes(), loudness, peak
+
+
+class WaveformAnalyzer:
+    """
+    Berechnet im Hintergrund Hüllkurve und Lautheit jedes Titels in einem
+    Durchgang und speichert beides im Bibliotheks-Index. Die Worker laufen
+    mit Idle-Priorität in einem kleinen Prozess-Pool; der gerade gespielte
+    Titel kommt vor.
+    """
+
+    def __init__(self, folder, db_path=None, workers=1):
+        self.folder = folder
+        self.db_path = db_path
+        self.workers = max(1, workers)
+        self.priority = deque()
+        self.analyzed = 0
+        self.thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="waveforms", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self.thread:
+            self.thread.join()
+
+    def prioritize(self, path):
+        """Diesen Titel als nächsten analysieren (z.B. weil er gerade startet)."""
+        self.priority.append(path)
+        self._wake.set()
+
+    def _next_batch(self, index, suffix):
+        batch = []
+        while self.priority:
+            path = self.priority.popleft()
+            try:
+                mtime = os.stat(os.path.join(self.folder, path)).st_mtime
+            except OSError:
+                continue
+            if not index.has_analysis(path, mtime):
+                batch.append((path, mtime))
+        seen = {path for path, _ in batch}
+        batch += [row for row in index.missing_analysis(BATCH_SIZE, suffix) if row[0] not in seen]
+        return batch
+
+    def _run(self):
+        index = LibraryIndex(self.folder, self.db_path)
+        # Ohne ffmpeg lassen sich nur WAV-Dateien lesen
+        suffix = None if shutil.which("ffmpeg") else ".wav"
+        context = multiprocessing.get_context("fork")
+        try:
+            with ProcessPoolExecutor(self.workers, mp_context=context, initializer=_lower_priority) as pool:
+                while not self._stop.is_set():
+                    batch = self._next_batch(index, suffix)
+                    if not batch:
+                        self._wake.wait(IDLE_INTERVAL)
+                        self._wake.clear()
+                        continue
+
+                    in_flight = {}
+                    for path, mtime in batch:
+                        if self._stop.is_set():
+                            break
+                        future = pool.submit(analyze_track, os.path.join(self.folder, path))
+                        in_flight[future] = (path, mtime)
+                        # Höchstens zwei Aufträge pro Worker vorhalten
+                        while len(in_flight) >= self.workers * 2:
+                            self._collect(index, in_flight)
+                    while in_flight and not self._stop.is_set():
+                        self._collect(index, in_flight)
+                    for future in in_flight:
+                        future.cancel()
+        finally:
+            index.close()
+
+    def _collect(self, index, in_flight):
+        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in finished:
+            path, mtime = in_flight.pop(future)
+            try:
+                peaks, rms, loudness, peak = future.result()
+            except Exception:
+                peaks, rms, loudness, peak = b"", b"", None, None
+            # Jedes Ergebnis sofort committen: Eine über mehrere Dekodierungen offene
+            # Schreibtransaktion würde Scanner und Watcher mit "database is locked" abweisen
+            with index.lock:
+                try:
+                    index.store_waveform(path, mtime, peaks, rms)
+                    index.store_loudness(path, mtime, loudness, peak)
+                    index.conn.commit()
+                except sqlite3.OperationalError as e:
+                    # Bleibt im Index als fehlend und wird später erneut analysiert
+                    index.conn.rollback()
+                    print(f"Analyse von {path} nicht gespeichert: {e}")
+            self.analyzed += 1